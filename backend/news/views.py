@@ -9,7 +9,7 @@ import requests
 import feedparser
 import json
 import os
-from bs4 import BeautifulSoup
+from uk_water_tracker.html_parsing import make_soup
 
 CACHE_TIMEOUT = 5 * 60
 
@@ -18,7 +18,24 @@ def clean_html(text: str) -> str:
     """Strip HTML tags from a string."""
     if not text:
         return ""
-    return BeautifulSoup(text, "html.parser").get_text(" ", strip=True)
+    return make_soup(text).get_text(" ", strip=True)
+
+# What feedparser sends when it opens a URL itself; some feed hosts reject
+# requests' default User-Agent.
+FEED_HEADERS = {"User-Agent": feedparser.USER_AGENT, "Accept": feedparser.http.ACCEPT_HEADER}
+
+
+def fetch_feed(url: str):
+    """Fetch an RSS/Atom feed with ``requests`` and parse the body.
+
+    Going through ``requests`` rather than letting feedparser open the URL
+    keeps feeds on the same path as every other source, so HTTP fixtures
+    (``uk_water_tracker.http_replay``) record and replay them too.
+    """
+    resp = requests.get(url, headers=FEED_HEADERS, timeout=10)
+    resp.raise_for_status()
+    return feedparser.parse(resp.content)
+
 
 class NewsArticleViewSet(viewsets.ModelViewSet):
     queryset = NewsArticle.objects.all()
@@ -153,7 +170,7 @@ class AlertScraperAPIView(APIView):
         articles = []
         for feed_url in self.FEEDS:
             try:
-                feed = feedparser.parse(feed_url)
+                feed = fetch_feed(feed_url)
             except Exception:
                 continue
 
@@ -202,7 +219,7 @@ class FloodMonitoringAPIView(APIView):
 
     def _fetch_feed(self, url: str):
         try:
-            return feedparser.parse(url)
+            return fetch_feed(url)
         except Exception:
             return None
 
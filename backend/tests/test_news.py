@@ -23,12 +23,32 @@ def test_water_news(api_client, monkeypatch):
 
 @pytest.mark.django_db
 def test_alert_scraper(api_client, monkeypatch):
+    class FakeResp:
+        content = b''
+        def raise_for_status(self):
+            pass
     class FakeFeed: entries = [{'title':'flood','summary':'s','link':'u','published':'2024'}]
-    monkeypatch.setattr(feedparser, 'parse', lambda url: FakeFeed())
+    monkeypatch.setattr(requests, 'get', lambda *a, **k: FakeResp())
+    monkeypatch.setattr(feedparser, 'parse', lambda body: FakeFeed())
     resp = api_client.get('/api/news/alerts/')
     assert resp.status_code == 200
     assert 'news' in resp.json()
 
+def test_fetch_feed_sends_feedparser_user_agent(monkeypatch):
+    from news.views import fetch_feed
+    sent = {}
+    class FakeResp:
+        content = RSS
+        def raise_for_status(self):
+            pass
+    def get(url, **kwargs):
+        sent.update(kwargs)
+        return FakeResp()
+    monkeypatch.setattr(requests, 'get', get)
+    feed = fetch_feed('https://example.com/rss')
+    assert feed.entries[0].link == 'https://example.com/severn'
+    assert sent['headers']['User-Agent'] == feedparser.USER_AGENT
+
 @pytest.mark.django_db
 def test_flood_monitoring(api_client, monkeypatch):
     monkeypatch.setattr(FloodMonitoringAPIView, '_fetch_json', lambda *a, **k: {'items':[]})
@@ -50,3 +70,41 @@ def test_gdelt_news(api_client, monkeypatch):
     resp = api_client.get('/api/news/gdelt/')
     assert resp.status_code == 200
     assert 'news' in resp.json()
+
+RSS = (b'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>'
+       b'<item><title>Flood warning on the Severn</title><description>Rivers rising</description>'
+       b'<link>https://example.com/severn</link><pubDate>Mon, 01 Jan 2024 00:00:00 GMT</pubDate>'
+       b'</item></channel></rss>')
+
+@pytest.mark.django_db
+def test_alert_feeds_record_and_replay_offline(api_client, monkeypatch, tmp_path):
+    from django.core.cache import cache
+    from uk_water_tracker import http_replay
+
+    def network(adapter, request, **kwargs):
+        return http_replay._build_response(
+            request, {'status': 200, 'headers': {'Content-Type': 'application/rss+xml'}, 'body': RSS}
+        )
+
+    def alerts():
+        cache.clear()
+        resp = api_client.get('/api/news/alerts/')
+        assert resp.status_code == 200
+        return [a['url'] for a in resp.json()['news']]
+
+    with monkeypatch.context() as m:
+        m.setattr(http_replay, '_real_send', network)
+        with http_replay.record(tmp_path):
+            assert alerts() == ['https://example.com/severn']
+    assert len(list(tmp_path.rglob('*.json'))) == 2
+
+    with http_replay.replay(tmp_path):
+        assert alerts() == ['https://example.com/severn']
+
+    server = http_replay.ReplayServer(tmp_path).start()
+    try:
+        with server.redirect():
+            assert alerts() == ['https://example.com/severn']
+    finally:
+        server.stop()
+    assert server.served == 2
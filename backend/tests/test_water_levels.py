@@ -1,4 +1,6 @@
 import datetime
+from pathlib import Path
+
 import pytest
 from water_levels.models import (
     ScottishWaterAverageLevel,
@@ -14,6 +16,7 @@ from water_levels.models import (
     EAwaterLevel,
     EAwaterPrediction,
     EAwaterPredictionAccuracy,
+    EAwaterStationPrediction,
     ScottishWaterRegionalForecast,
     SevernTrentForecastAccuracy,
     YorkshireWaterPredictionAccuracy,
@@ -301,3 +304,883 @@ def test_scottishwater_prediction_accuracy(api_client):
     )
     resp = api_client.get("/api/water-levels/scottishwater-prediction-accuracy/")
     assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+def test_EAwater_level_writer_upserts_in_chunks():
+    from water_levels.scraper.environment_agency.EA_Stations_scraper import (
+        EAwaterLevelWriter,
+    )
+
+    station = EAwaterStation.objects.create(
+        station_id="s1", name="S1", region="north"
+    )
+    EAwaterLevel.objects.create(
+        station=station, date=datetime.date(2024, 1, 1), value=1.0
+    )
+    writer = EAwaterLevelWriter(chunk_size=2)
+    writer.add(station, datetime.date(2024, 1, 1), 5.0, "Good")
+    writer.add(station, datetime.date(2024, 1, 8), 6.0, "Good")
+    writer.add(station, datetime.date(2024, 1, 15), 7.0, "Good")
+    writer.flush()
+
+    assert writer.rows == 3
+    assert EAwaterLevel.objects.count() == 3
+    assert EAwaterLevel.objects.get(date=datetime.date(2024, 1, 1)).value == 5.0
+
+
+def test_southernwater_prepare_levels_vectorised():
+    from water_levels.scraper.southern_water.southern_water_scrapper import (
+        prepare_reservoir_levels,
+    )
+
+    rows = [(f"{day}Aug", str(50 + day), "60", "10") for day in range(1, 7)]
+    rows.append(("not a date", "99", "60", "10"))
+    levels = prepare_reservoir_levels(rows).set_index("date")
+
+    assert len(levels) == 6
+    assert levels.loc[datetime.date(2024, 8, 1), "change_week"] == 0.0
+    assert levels.loc[datetime.date(2024, 8, 2), "change_week"] == 1.0
+    assert levels.loc[datetime.date(2024, 8, 5), "change_month"] == 4.0
+    assert levels.loc[datetime.date(2024, 8, 6), "difference_from_average"] == -4.0
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, json=None, content=b"", headers=None):
+        self.status_code = status_code
+        self._json = json
+        self.content = content
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        return self._json
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+def fake_http(monkeypatch, handler):
+    """Route every scraper request to ``handler(url, params, headers)``; returns the request log."""
+    from water_levels.scraper import base
+
+    calls = []
+
+    class FakeSession:
+        def get(self, url, params=None, headers=None, **kwargs):
+            calls.append((url, dict(params or {}), dict(headers or {})))
+            return handler(url, dict(params or {}), dict(headers or {}))
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(base, "build_session", lambda **kwargs: FakeSession())
+    return calls
+
+
+@pytest.mark.django_db
+def test_EA_history_sync_requests_only_new_readings_and_stations(monkeypatch, settings):
+    from water_levels.models import EAwaterSyncState
+    from water_levels.scraper.environment_agency.EA_Stations_scraper import (
+        MEASURES_URL, READINGS_URL, STATIONS_URL, import_historical_EAwater_levels,
+    )
+
+    settings.EA_REQUESTS_PER_SECOND = 0
+    catalogue = [{"notation": "S1", "label": "One", "lat": 52.0, "long": -1.0}]
+    measures = {"S1": ["m1"]}
+    readings = {"m1": ["2024-01-01", "2024-02-01"], "m1b": ["2023-06-01"], "m2": ["2024-01-15"]}
+
+    def api(url, params, headers):
+        if url == STATIONS_URL:
+            return FakeResponse(json={"items": catalogue})
+        if url == MEASURES_URL:
+            return FakeResponse(json={"items": [{"@id": m} for m in measures[params["station"]]]})
+        assert url == READINGS_URL
+        since = params.get("min-date", "")
+        return FakeResponse(json={"items": [
+            {"dateTime": f"{d}T09:00:00", "value": 1.0, "quality": "Good"}
+            for d in readings[params["measure"]] if d >= since
+        ]})
+
+    calls = fake_http(monkeypatch, api)
+    import_historical_EAwater_levels()
+    assert EAwaterLevel.objects.count() == 2
+    s1 = EAwaterStation.objects.get(station_id="S1")
+
+    catalogue.append({"notation": "S2", "label": "Two", "lat": 51.0, "long": 0.5})
+    measures.update({"S1": ["m1", "m1b"], "S2": ["m2"]})
+    readings["m1"].append("2024-03-01")
+    calls.clear()
+    import_historical_EAwater_levels()
+
+    requested = {p["measure"]: p.get("min-date") for url, p, _ in calls if url == READINGS_URL}
+    assert requested == {"m1": "2024-02-01", "m1b": None, "m2": None}
+    assert EAwaterStation.objects.count() == 2
+    assert EAwaterStation.objects.get(station_id="S1").pk == s1.pk
+    assert EAwaterLevel.objects.count() == 5
+    assert EAwaterSyncState.objects.get(station=s1, measure="m1b").last_reading_date == datetime.date(2023, 6, 1)
+
+
+def test_EA_measure_readings_page_until_a_short_page(monkeypatch, settings):
+    import requests
+    from water_levels.scraper.environment_agency.EA_Stations_scraper import EAScraper
+
+    settings.EA_REQUESTS_PER_SECOND = 0
+    pages = [
+        [{"dateTime": "2024-01-01T09:00:00Z", "value": 1.0, "quality": "Good"},
+         {"dateTime": "2024-01-02T09:00:00Z", "value": None, "quality": "Good"}],
+        [{"dateTime": "2024-01-03T09:00:00Z", "value": 3.0, "quality": "Missing"},
+         {"date": "2024-01-04", "value": 4.0}],
+        [{"dateTime": "2024-01-05T09:00:00Z", "value": 5.0, "quality": "Suspect"}],
+    ]
+    calls = fake_http(monkeypatch, lambda url, params, headers: FakeResponse(
+        json={"items": pages[params["_offset"] // params["_limit"]]}
+    ))
+    scraper = EAScraper()
+    rows = list(scraper.iter_measure_readings("S1", "m1", page_size=2))
+
+    assert rows == [
+        ("S1", datetime.date(2024, 1, 1), 1.0, "Good"),
+        ("S1", datetime.date(2024, 1, 4), 4.0, "Unknown"),
+        ("S1", datetime.date(2024, 1, 5), 5.0, "Suspect"),
+    ]
+    assert [params["_offset"] for _, params, _ in calls] == [0, 2, 4]
+
+    fake_http(monkeypatch, lambda url, params, headers: FakeResponse(
+        status_code=404 if params["_offset"] else 200, json={"items": pages[0]}
+    ))
+    with pytest.raises(requests.HTTPError):
+        list(EAScraper().iter_measure_readings("S1", "m1", page_size=2))
+
+
+def test_base_scraper_retries_and_reports(monkeypatch, settings):
+    from water_levels.scraper import base
+
+    settings.SCRAPER_BACKOFF_SECONDS = 0
+    statuses = [503, 200]
+
+    class FakeResponse:
+        headers = {}
+
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    class FakeSession:
+        def get(self, url, **kwargs):
+            return FakeResponse(statuses.pop(0))
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(base, "build_session", lambda **kwargs: FakeSession())
+
+    class DemoScraper(base.BaseScraper):
+        def scrape(self):
+            response = self.get("https://example.com/levels")
+            with self.phase("parse"):
+                self.result.rows_fetched = 3
+            return response.status_code
+
+    result = DemoScraper().run()
+
+    assert result.value == 200
+    assert result.requests == 2
+    assert result.retries == 1
+    assert result.rows_fetched == 3
+    assert set(result.timings) == {"fetch", "parse"}
+
+
+SEVERN_PAGE = (Path(__file__).parent / "fixtures" / "severn_trent_reservoir_levels.html").read_bytes()
+
+
+@pytest.mark.django_db
+def test_severn_trent_fetch_skips_unchanged_pages(monkeypatch):
+    from water_levels.models import ScraperPageCache
+    from water_levels.scraper.http import source_changed
+    from water_levels.scraper.severn_trent import severn_trent_scrapper as severn
+
+    replies = []
+    calls = fake_http(monkeypatch, lambda url, params, headers: replies.pop(0))
+
+    replies.append(FakeResponse(content=SEVERN_PAGE, headers={"ETag": '"v1"'}))
+    assert severn.extract_severn_trent_water_levels() == "3 records updated."
+    assert SevernTrentReservoirLevel.objects.get(date=datetime.date(2025, 10, 13)).percentage == 84.6
+
+    replies.append(FakeResponse(status_code=304))
+    assert severn.extract_severn_trent_water_levels() == "unchanged"
+    assert calls[-1][2]["If-None-Match"] == '"v1"'
+    assert not source_changed(severn.URL)
+
+    # A new nonce and ETag around the same readings hash the same.
+    reissued = SEVERN_PAGE.replace(b"abc123", b"def456")
+    replies.append(FakeResponse(content=reissued, headers={"ETag": '"v2"'}))
+    assert severn.extract_severn_trent_water_levels() == "unchanged"
+
+    # The new hash is only stored once the page has been parsed and written.
+    updated = SEVERN_PAGE.replace(b"84.6%", b"85.0%")
+    make_soup = severn.make_soup
+    monkeypatch.setattr(severn, "make_soup", lambda *a, **k: 1 / 0)
+    replies.append(FakeResponse(content=updated, headers={"ETag": '"v3"'}))
+    assert severn.extract_severn_trent_water_levels() == "Error"
+    assert ScraperPageCache.objects.get(url=severn.URL).etag == '"v1"'
+
+    monkeypatch.setattr(severn, "make_soup", make_soup)
+    replies.append(FakeResponse(content=updated, headers={"ETag": '"v3"'}))
+    assert severn.extract_severn_trent_water_levels() == "3 records updated."
+    assert SevernTrentReservoirLevel.objects.get(date=datetime.date(2025, 10, 13)).percentage == 85.0
+    assert ScraperPageCache.objects.get(url=severn.URL).etag == '"v3"'
+    assert source_changed(severn.URL)
+
+
+def test_html_parser_follows_per_host_setting_and_falls_back(monkeypatch, settings):
+    from uk_water_tracker import html_parsing
+    from water_levels.scraper.severn_trent.severn_trent_scrapper import URL
+
+    settings.HTML_PARSERS = {"www.stwater.co.uk": "html.parser"}
+    assert html_parsing.parser_for(URL) == "html.parser"
+    assert html_parsing.parser_for("https://example.com/") == html_parsing.available_parsers()[0]
+
+    settings.HTML_PARSERS = {"www.stwater.co.uk": "no-such-parser", "default": "html.parser"}
+    assert html_parsing.parser_for(URL) == "html.parser"
+    assert html_parsing.make_soup("<p>x</p>", parser="no-such-parser").p.text == "x"
+
+    # Without lxml installed everything lands on the pure-Python parser.
+    settings.HTML_PARSERS = {"www.stwater.co.uk": "lxml"}
+    monkeypatch.setattr(html_parsing, "parser_available", lambda parser: parser == "html.parser")
+    assert html_parsing.parser_for(URL) == "html.parser"
+    assert html_parsing.make_soup("<p>x</p>", source=URL, parser="lxml").p.text == "x"
+
+
+@pytest.mark.django_db
+def test_severn_trent_rows_match_across_html_parsers(monkeypatch, settings):
+    import warnings
+    pytest.importorskip("lxml")
+    from water_levels.scraper.severn_trent.severn_trent_scrapper import SevernTrentScraper
+
+    fake_http(monkeypatch, lambda url, params, headers: FakeResponse(content=SEVERN_PAGE))
+    rows = {}
+    for parser in ("lxml", "html.parser"):
+        settings.HTML_PARSERS = {"www.stwater.co.uk": parser}
+        SevernTrentReservoirLevel.objects.all().delete()
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            assert SevernTrentScraper().run(force=True).value == "3 records updated."
+        rows[parser] = list(SevernTrentReservoirLevel.objects.order_by("date").values_list("date", "percentage"))
+
+    assert rows["lxml"] == rows["html.parser"]
+    assert rows["lxml"][-1] == (datetime.date(2025, 10, 13), 84.6)
+
+
+def test_scottish_water_fingerprint_covers_only_the_level_tables():
+    from water_levels.scraper.scottish_water.scottish_water_scrapper import _data_section
+
+    page = (
+        '<html><head><script>var t = "{token}";</script></head><body>'
+        "<p>Last updated: 13 October 2025</p>"
+        "<h2>Average levels Scotland-wide</h2><table><tr><td>Scotland</td><td>{level}%</td></tr></table>"
+        "</body></html>"
+    )
+
+    def fingerprint(**fields):
+        return _data_section(FakeResponse(content=page.format(**fields).encode()))
+
+    assert fingerprint(token="a", level=80) == fingerprint(token="b", level=80)
+    assert fingerprint(token="a", level=80) != fingerprint(token="a", level=81)
+
+
+@pytest.mark.django_db
+def test_weekly_predictions_only_run_when_the_source_changed(monkeypatch):
+    from water_levels import tasks
+    from water_levels.models import ScraperPageCache
+
+    ran = []
+    monkeypatch.setattr(tasks, "_forecast", lambda provider, accuracy: ran.append(provider))
+    ScraperPageCache.objects.create(url=tasks.SEVERN_TRENT_URL, changed=False)
+    ScraperPageCache.objects.create(url=tasks.SCOTTISH_WATER_URL, changed=True)
+
+    assert tasks.weekly_severn_trent_predictions() == "source unchanged"
+    assert tasks.weekly_severn_trent_predictions(force=True) == "scheduled"
+    assert tasks.weekly_scottish_water_wide_predictions() == "scheduled"
+    assert ran == ["severn_trent", "scottish_water_wide"]
+
+
+@pytest.mark.parametrize("concurrency", [1, 2])
+def test_yorkshire_crawl_stops_at_first_fully_known_page(monkeypatch, settings, concurrency):
+    from water_levels.scraper.yorkshire.yorkshire_pdf_scraper import URL, YorkshireScraper
+
+    settings.YORKSHIRE_REQUESTS_PER_SECOND = 0
+    months = ["October 2025", "September 2025", "August 2025", "July 2025", "June 2025", "May 2025"]
+    site = {page: months[2 * (page - 1):2 * page] for page in range(1, 4)}
+    site.update({page: [] for page in range(4, 9)})
+
+    def page(url, params, headers):
+        number = int(url.removeprefix(f"{URL}?page="))
+        blocks = "".join(
+            f'<div class="container is-flex"><h3>{month}</h3>'
+            f"<p>Reservoir Stocks have increased to {60 + i}% (up 1.5%)</p></div>"
+            for i, month in enumerate(site[number])
+        )
+        return FakeResponse(content=f"<html><body>{blocks}</body></html>".encode())
+
+    calls = fake_http(monkeypatch, page)
+    known = {datetime.date(2025, m, 1) for m in (5, 6, 7, 8)}
+    records = YorkshireScraper(concurrency=concurrency).crawl(known_dates=known)
+
+    assert [r["report_date"] for r in records] == [datetime.date(2025, 10, 1), datetime.date(2025, 9, 1)]
+    assert records[0]["reservoir_level"] == 60.0 and records[0]["weekly_difference"] == 1.5
+    # Page 2 holds only stored months; nothing past its batch of `concurrency` pages is asked for.
+    assert sorted(url for url, _, _ in calls) == [f"{URL}?page={n}" for n in range(1, 3)]
+
+
+def test_fit_cache_reuses_unchanged_series_and_evicts(tmp_path, settings):
+    import pandas as pd
+    from water_levels.ml.fit_cache import FitCache
+
+    settings.ML_FIT_CACHE_ENABLED = True
+    cache = FitCache(directory=tmp_path, max_entries=2, max_age_days=30, max_mb=1)
+    series = pd.Series([1.0, 2.0, 3.0], index=pd.date_range("2024-01-01", periods=3, freq="W"))
+    fits = []
+
+    def fit():
+        fits.append(1)
+        return [4.0, 5.0]
+
+    first = cache.get_or_fit(series, "ARIMA", {"steps": 2}, fit)
+    second = cache.get_or_fit(series, "ARIMA", {"steps": 2}, fit)
+    cache.get_or_fit(series, "ARIMA", {"steps": 3}, fit)
+    cache.get_or_fit(series.iloc[:2], "ARIMA", {"steps": 2}, fit)
+
+    assert list(first) == list(second) == [4.0, 5.0]
+    assert len(fits) == 3
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+    assert cache.stats()["evictions"] == 1
+    assert len(list(tmp_path.glob("*/*.json"))) == 2
+
+
+def test_harmonic_forecast_matches_per_series_lstsq():
+    import numpy as np
+    from water_levels.ml.harmonic_regression import harmonic_forecast
+
+    rng = np.random.default_rng(0)
+    series = [
+        50 + 20 * np.sin(2 * np.pi * np.arange(n) / 52) + 0.02 * np.arange(n) + rng.normal(0, 1, n)
+        for n in (40, 120, 300)
+    ]
+    series[1][7] = np.nan
+
+    def lstsq_forecast(y, steps, period=52):
+        def design(t):
+            return np.column_stack(
+                [np.ones(len(t)), t, np.sin(2 * np.pi * t / period), np.cos(2 * np.pi * t / period)]
+            )
+
+        t = np.arange(len(y))
+        ok = np.isfinite(y)
+        beta = np.linalg.lstsq(design(t)[ok], y[ok], rcond=None)[0]
+        return design(np.arange(len(y), len(y) + steps)) @ beta
+
+    preds = harmonic_forecast(series, steps=6)
+
+    assert preds.shape == (3, 6)
+    for y, pred in zip(series, preds):
+        np.testing.assert_allclose(pred, lstsq_forecast(y, 6), rtol=1e-8)
+
+
+def test_fit_many_collects_results_and_errors_from_pool():
+    import math
+    from water_levels.ml.parallel import fit_many
+
+    jobs = {"a": (4.0,), "b": (9.0,), "bad": (-1.0,)}
+    for workers in (1, 2):
+        results, errors = fit_many(math.sqrt, jobs, workers=workers)
+
+        assert results == {"a": 2.0, "b": 3.0}
+        assert list(errors) == ["bad"]
+        assert isinstance(errors["bad"], ValueError)
+
+
+def test_fit_many_uses_a_pool_inside_a_daemonic_worker(capfd):
+    import math
+    import multiprocessing
+    import os
+    from water_levels.ml.parallel import fit_many
+
+    # Celery's prefork workers are daemonic; stdlib multiprocessing cannot start a pool there.
+    def worker(out):
+        try:
+            results, _ = fit_many(os.getpid, {i: () for i in range(4)}, workers=2)
+            _, errors = fit_many(math.sqrt, {"bad": (-1.0,)}, workers=2)
+            out.put((os.getpid(), set(results.values()), errors))
+        except BaseException as exc:
+            out.put(exc)
+
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    parent = ctx.Process(target=worker, args=(out,), daemon=True)
+    parent.start()
+    reply = out.get(timeout=120)
+    parent.join()
+
+    assert not isinstance(reply, BaseException), reply
+    parent_pid, worker_pids, errors = reply
+    assert parent_pid not in worker_pids
+    assert isinstance(errors["bad"], ValueError)
+    assert "4/4 series fitted on 2 worker(s)" in capfd.readouterr().out
+
+
+@pytest.mark.django_db
+def test_engine_loads_once_and_writes_every_model(tmp_path, settings, django_assert_max_num_queries):
+    import numpy as np
+    import pandas as pd
+    from water_levels.ml.engine import run_forecasts
+    from water_levels.ml.forecasting import forecast_regression
+
+    settings.ML_ARTIFACT_DIR = str(tmp_path)
+    settings.ML_FIT_CACHE_ENABLED = False
+    settings.ML_FIT_WORKERS = 1
+    start = datetime.date(2024, 1, 1)
+    for reservoir, offset in (("Bewl", 0.0), ("Weir Wood", 10.0)):
+        SouthernWaterReservoirLevel.objects.bulk_create(
+            SouthernWaterReservoirLevel(
+                reservoir=reservoir,
+                date=start + datetime.timedelta(weeks=i),
+                current_level=50 + offset + 10 * np.sin(i / 4),
+                average_level=55,
+                change_week=0,
+                change_month=0,
+                difference_from_average=0,
+            )
+            for i in range(20)
+        )
+
+    with django_assert_max_num_queries(1):
+        from water_levels.ml.engine import SPECS, load_series
+
+        prepared = load_series(SPECS["southern_water"])
+    assert sorted(prepared) == ["Bewl", "Weir Wood"]
+
+    counts = run_forecasts("southern_water", models=("ARIMA", "REGRESSION"))
+
+    assert counts == {"ARIMA": 48, "REGRESSION": 48}
+    assert SouthernWaterReservoirForecast.objects.filter(model_type="ARIMA").count() == 48
+    bewl = pd.Series(
+        [50 + 10 * np.sin(i / 4) for i in range(20)],
+        index=pd.date_range(start, periods=20, freq="W-MON"),
+    )
+    expected = forecast_regression(bewl.resample("W").ffill().interpolate(), steps=24)
+    stored = SouthernWaterReservoirForecast.objects.filter(
+        reservoir="Bewl", model_type="REGRESSION"
+    ).order_by("date")
+    assert [f.predicted_level for f in stored] == [round(float(v), 2) for v in expected]
+    assert stored[0].date == datetime.date(2024, 5, 19) + datetime.timedelta(weeks=1)
+
+
+@pytest.mark.django_db
+def test_engine_writes_other_models_when_one_fails(monkeypatch):
+    from water_levels.ml import engine
+
+    def boom(spec, prepared, deadline=None):
+        raise RuntimeError("tensorflow unavailable")
+
+    monkeypatch.setitem(engine.RUNNERS, "LSTM", boom)
+    start = datetime.date(2024, 1, 1)
+    SevernTrentReservoirLevel.objects.bulk_create(
+        SevernTrentReservoirLevel(date=start + datetime.timedelta(weeks=i), percentage=80.0 + i % 3)
+        for i in range(20)
+    )
+
+    counts = engine.run_forecasts("severn_trent", models=("LSTM", "REGRESSION"))
+
+    assert counts == {"REGRESSION": 4}
+    assert SevernTrentReservoirForecast.objects.filter(model_type="REGRESSION").count() == 4
+
+
+def test_budget_is_shared_by_fitting_stages_only(monkeypatch):
+    import time
+    from water_levels.ml import engine
+
+    shares = {}
+
+    def runner(model_type):
+        def run(spec, prepared, deadline=None):
+            shares[model_type] = deadline - time.monotonic()
+            return {}
+        return run
+
+    for model_type in engine.RUNNERS:
+        monkeypatch.setitem(engine.RUNNERS, model_type, runner(model_type))
+    monkeypatch.setattr(engine, "load_series", lambda spec: {"S1": None})
+    monkeypatch.setattr(engine, "write_forecasts", lambda spec, results: 0)
+    monkeypatch.setattr(engine, "write_dated_forecasts", lambda spec, forecasts: 0)
+    monkeypatch.setattr(engine, "_run_ensemble", lambda spec, prepared: {})
+
+    # The weekly station order: REGRESSION finishes at once, so LSTM gets half of what is left.
+    engine.run_forecasts(
+        "environment_agency_stations", models=("REGRESSION", "LSTM", "ARIMA", "ENSEMBLE"), budget=90
+    )
+    assert shares["REGRESSION"] == pytest.approx(30, abs=1)
+    assert shares["LSTM"] == pytest.approx(45, abs=1)
+    assert shares["ARIMA"] == pytest.approx(90, abs=1)
+
+    engine.run_forecasts("environment_agency_stations", models=("LSTM", "ENSEMBLE"), budget=90)
+    assert shares["LSTM"] == pytest.approx(90, abs=1)
+
+
+@pytest.mark.django_db
+def test_upsert_forecasts_updates_on_unique_key(django_assert_max_num_queries):
+    from water_levels.utils import upsert_forecasts
+
+    day = datetime.date(2024, 1, 1)
+    existing = EAwaterPrediction.objects.create(
+        region="north", model_type="ARIMA", date=day, predicted_value=1.0
+    )
+    rows = [
+        {"region": "north", "model_type": "ARIMA", "date": day, "predicted_value": 2.0},
+        {"region": "north", "model_type": "ARIMA", "date": day, "predicted_value": 3.0},
+        {"region": "south", "model_type": "ARIMA", "date": day, "predicted_value": 4.0},
+    ]
+
+    with django_assert_max_num_queries(3):
+        sent = upsert_forecasts(EAwaterPrediction, rows)
+
+    assert sent == 2
+    assert EAwaterPrediction.objects.count() == 2
+    updated = EAwaterPrediction.objects.get(region="north")
+    assert updated.predicted_value == 3.0
+    assert updated.created_at == existing.created_at
+
+
+def test_web_and_task_imports_do_not_load_ml_stack():
+    import json
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    # Import what a web worker and a Celery IO worker load at boot, in a fresh interpreter.
+    code = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        "import django\n"
+        "django.setup()\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"
+        "import water_levels.tasks\n"
+        "heavy = ('tensorflow', 'keras', 'statsmodels', 'sklearn')\n"
+        "print(json.dumps({'seconds': time.perf_counter() - t0,\n"
+        "                  'loaded': [m for m in heavy if m in sys.modules]}))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parents[1],
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "uk_water_tracker.settings"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    print(f"web/task import time: {report['seconds']:.2f}s")
+
+    assert report["loaded"] == []
+
+
+def test_numpy_lstm_reproduces_keras_forecasts(tmp_path):
+    import numpy as np
+    pytest.importorskip("tensorflow")
+    from water_levels.ml.general_lstm.lstm import build_model, rollout
+    from water_levels.ml.general_lstm.numpy_lstm import NumpyLSTM, export_weights
+
+    rng = np.random.default_rng(0)
+    batch = rng.uniform(0, 1, (5, 12, 1)).astype("float32")
+    for horizon in (1, 4):
+        model = build_model(12, horizon=horizon)
+        runtime = NumpyLSTM.load(export_weights(model, tmp_path / f"h{horizon}.npz"))
+
+        np.testing.assert_allclose(runtime(batch), model(batch, training=False).numpy(), atol=1e-5)
+        np.testing.assert_allclose(
+            rollout(runtime, batch, 4), rollout(model, batch, 4), atol=1e-5
+        )
+
+
+def test_compiled_and_direct_rollouts_match_keras_predict():
+    import numpy as np
+    pytest.importorskip("tensorflow")
+    from water_levels.ml.general_lstm.lstm import build_model, compiled_step, rollout
+    from water_levels.ml.general_lstm.numpy_lstm import NumpyLSTM
+
+    rng = np.random.default_rng(1)
+    batch = rng.uniform(0, 1, (3, 12, 1)).astype("float32")
+
+    # The original recursive forecast: one ``predict`` per step, fed its own output.
+    model = build_model(12)
+    x, expected = batch, []
+    for _ in range(4):
+        pred = model.predict(x, verbose=0)
+        expected.append(pred[:, 0])
+        x = np.concatenate([x[:, 1:], pred.reshape(-1, 1, 1)], axis=1)
+    expected = np.stack(expected, axis=1)
+
+    np.testing.assert_allclose(rollout(model, batch, 4), expected, atol=1e-5)
+    np.testing.assert_allclose(rollout(model, batch, 4, step_fn=compiled_step(model)), expected, atol=1e-5)
+    np.testing.assert_allclose(NumpyLSTM.from_keras(model).rollout(batch, 4), expected, atol=1e-5)
+
+    # A direct model (as used by backtesting's ``direct=True``) answers every step in one pass.
+    direct = build_model(12, horizon=4)
+    expected = direct.predict(batch, verbose=0)
+    np.testing.assert_allclose(rollout(direct, batch, 4), expected, atol=1e-5)
+    np.testing.assert_allclose(rollout(direct, batch, 2), expected[:, :2], atol=1e-5)
+    np.testing.assert_allclose(NumpyLSTM.from_keras(direct).rollout(batch, 4), expected, atol=1e-5)
+
+
+def test_keyed_lstm_reuses_then_fine_tunes_saved_model(tmp_path, settings, monkeypatch, capsys):
+    import time
+    import numpy as np
+    import pandas as pd
+    pytest.importorskip("tensorflow")
+    from water_levels.ml.general_lstm import lstm
+    from water_levels.ml.general_lstm.numpy_lstm import NumpyLSTM
+
+    settings.ML_ARTIFACT_DIR = str(tmp_path)
+    settings.LSTM_FORECAST_MODE = "recursive"
+    monkeypatch.setattr(lstm, "FULL_EPOCHS", 2)
+    runtimes = []
+    real_rollout = lstm.rollout
+    monkeypatch.setattr(lstm, "rollout", lambda model, *a, **kw: (
+        runtimes.append(type(model)), real_rollout(model, *a, **kw))[1])
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=40, freq="W-MON"),
+        "percentage": 50 + 10 * np.sin(np.arange(40) / 4),
+    })
+
+    lstm.train_lstm(df.iloc[:36], key="demo")
+    first = lstm.train_lstm(df.iloc[:36], key="demo")
+    assert "reusing saved model" in capsys.readouterr().out
+    assert runtimes[-1] is NumpyLSTM and len(first) == 4
+
+    lstm.train_lstm(df, key="demo")
+    assert "fine-tuned on 4 new windows" in capsys.readouterr().out
+
+    # Integer names, like EA station ids, must survive the JSON metadata round trip.
+    frames = {1: df.iloc[:36], 2: df.iloc[:36].assign(percentage=lambda d: d.percentage + 5)}
+    lstm.train_global_lstm(frames, key="demo/global")
+    lstm.train_global_lstm(frames, key="demo/global")
+    assert "reusing saved model" in capsys.readouterr().out
+    assert runtimes[-1] is NumpyLSTM
+    grown = {1: df, 2: df.assign(percentage=lambda d: d.percentage + 5)}
+    lstm.train_global_lstm(grown, key="demo/global")
+    assert "fine-tuned on 8 new windows" in capsys.readouterr().out
+
+    lstm.train_global_lstm(frames, key="demo/late", deadline=time.monotonic())
+    assert "training stopped after 1 epoch(s)" in capsys.readouterr().out
+
+
+def test_arima_warm_starts_from_stored_params_and_falls_back(tmp_path, settings):
+    import numpy as np
+    import pandas as pd
+    from water_levels.ml.arima_state import get_arima_state
+    from water_levels.ml.forecasting import _fit_arima, forecast_arima_many
+
+    settings.ML_ARTIFACT_DIR = str(tmp_path)
+    settings.ML_FIT_CACHE_ENABLED = False
+    settings.ML_FIT_WORKERS = 1
+    settings.ARIMA_WARM_START = True
+    settings.ARIMA_INCREMENTAL_UPDATE = False
+    rng = np.random.default_rng(0)
+    t = np.arange(157)
+    s = pd.Series(
+        50 + 20 * np.sin(2 * np.pi * t / 52) + np.cumsum(rng.normal(0, 1, 157)),
+        index=pd.date_range("2021-01-04", periods=157, freq="W-MON"),
+    )
+
+    forecast_arima_many({"Bewl": s.iloc[:-1]}, steps=4, key="southern_water")
+    cold = get_arima_state().get("southern_water/Bewl")
+    forecasts, errors = forecast_arima_many({"Bewl": s}, steps=4, key="southern_water")
+    warm = get_arima_state().get("southern_water/Bewl")
+
+    assert not errors and forecasts["Bewl"].shape == (4,)
+    assert cold["order"] == [2, 1, 2] and len(cold["params"]) == 5
+    assert warm["nobs"] == 157
+    assert warm["iterations"] < cold["iterations"]
+
+    bad_start = _fit_arima(s, 4, (2, 1, 2), start_params=[np.nan] * 5)
+    assert bad_start["fallback"] and not bad_start["warm"]
+    assert np.isfinite(bad_start["forecast"]).all()
+
+
+def test_arima_updates_by_filtering_until_refit_is_needed(tmp_path, settings):
+    import numpy as np
+    import pandas as pd
+    from water_levels.ml.arima_state import get_arima_state
+    from water_levels.ml.forecasting import ARIMA, forecast_arima_many
+
+    settings.ML_ARTIFACT_DIR = str(tmp_path)
+    settings.ML_FIT_CACHE_ENABLED = False
+    settings.ML_FIT_WORKERS = 1
+    settings.ARIMA_INCREMENTAL_UPDATE = True
+    settings.ARIMA_FULL_REFIT_DAYS = 28
+    settings.ARIMA_DRIFT_FACTOR = 3.0
+    rng = np.random.default_rng(1)
+    t = np.arange(160)
+    s = pd.Series(
+        50 + 20 * np.sin(2 * np.pi * t / 52) + np.cumsum(rng.normal(0, 1, 160)),
+        index=pd.date_range("2021-01-04", periods=160, freq="W-MON"),
+    )
+    store = get_arima_state()
+
+    def run(series):
+        forecasts, errors = forecast_arima_many({"Bewl": series}, steps=4, key="southern_water")
+        assert not errors
+        return forecasts["Bewl"], store.get("southern_water/Bewl")
+
+    _, fitted = run(s.iloc[:-3])
+    forecast, updated = run(s.iloc[:-2])
+
+    assert updated["params"] == fitted["params"]
+    assert updated["fitted_at"] == fitted["fitted_at"]
+    assert updated["nobs"] == 158 and updated["drift_n"] == 1
+    appended = ARIMA(s.values[:-3], order=(2, 1, 2)).filter(np.array(fitted["params"]))
+    expected = appended.append(s.values[-3:-2], refit=False).forecast(4)
+    np.testing.assert_allclose(forecast, expected)
+
+    revised = s.iloc[:-2].copy()
+    revised.iloc[10] += 5
+    _, refitted = run(revised)
+    assert refitted["fitted_at"] > updated["fitted_at"] and refitted["drift_n"] == 0
+
+    settings.ARIMA_DRIFT_FACTOR = 0.0
+    _, drifted = run(pd.concat([revised, s.iloc[-2:-1]]))
+    assert drifted["fitted_at"] > refitted["fitted_at"] and drifted["nobs"] == 159
+
+
+def test_order_search_picks_by_aic_and_reuses_until_ttl(tmp_path, settings, monkeypatch):
+    import numpy as np
+    import pandas as pd
+    from water_levels.ml import order_search
+
+    settings.ML_ARTIFACT_DIR = str(tmp_path)
+    settings.ML_FIT_WORKERS = 1
+    settings.ARIMA_ORDER_MAX_PQ = 1
+    settings.ARIMA_ORDER_AIC_MARGIN = 4.0
+    settings.ARIMA_ORDER_TTL_DAYS = 30
+    rng = np.random.default_rng(2)
+    noise = rng.normal(0, 1, 200)
+    values = np.zeros(200)
+    for i in range(1, 200):
+        values[i] = 0.8 * values[i - 1] + noise[i]
+    series = {"Bewl": pd.Series(values)}
+
+    chosen = order_search.select_orders(series, seasonal_period=None, key="southern_water")
+
+    (p, d, q), seasonal = chosen["Bewl"]
+    assert p == 1 and d == 0 and seasonal == (0, 0, 0, 0)
+    stored = order_search.get_arima_state().get("southern_water/Bewl")["selected"]
+    assert stored["order"] == [p, d, q] and np.isfinite(stored["aic"])
+
+    searched = []
+    monkeypatch.setattr(order_search, "search_orders",
+                        lambda todo, *args: searched.append(list(todo)) or {})
+    assert order_search.select_orders(series, seasonal_period=None, key="southern_water") == chosen
+    assert searched == []
+
+    settings.ARIMA_ORDER_TTL_DAYS = 0
+    order_search.select_orders(series, seasonal_period=None, key="southern_water")
+    assert searched == [["Bewl"]]
+
+
+@pytest.mark.django_db
+def test_ensemble_weights_stored_forecasts_by_recent_error(django_assert_max_num_queries):
+    from water_levels.ml.engine import run_forecasts
+
+    start = datetime.date(2024, 1, 1)
+    SevernTrentReservoirLevel.objects.bulk_create(
+        SevernTrentReservoirLevel(date=start + datetime.timedelta(weeks=i), percentage=80.0)
+        for i in range(10)
+    )
+    last = start + datetime.timedelta(weeks=9)
+    week = datetime.timedelta(weeks=1)
+    SevernTrentReservoirForecast.objects.bulk_create([
+        SevernTrentReservoirForecast(date=last, model_type="ARIMA", predicted_percentage=1.0),
+        SevernTrentReservoirForecast(date=last + week, model_type="ARIMA", predicted_percentage=90.0),
+        SevernTrentReservoirForecast(date=last + week, model_type="LSTM", predicted_percentage=70.0),
+        SevernTrentReservoirForecast(date=last + 2 * week, model_type="REGRESSION",
+                                     predicted_percentage=60.0),
+    ])
+    # ARIMA's latest errors average 1%, LSTM's 3%; the older 50% ARIMA error is outside the window.
+    errors = {"ARIMA": [50.0] + [1.0] * 8, "LSTM": [3.0] * 8}
+    SevernTrentForecastAccuracy.objects.bulk_create(
+        SevernTrentForecastAccuracy(
+            date=start + datetime.timedelta(weeks=i), model_type=model_type,
+            predicted_percentage=80.0, percentage_error=error,
+        )
+        for model_type, errs in errors.items()
+        for i, error in enumerate(errs)
+    )
+
+    with django_assert_max_num_queries(8):
+        counts = run_forecasts("severn_trent", models=("ENSEMBLE",))
+
+    assert counts == {"ENSEMBLE": 2}
+    stored = SevernTrentReservoirForecast.objects.filter(model_type="ENSEMBLE").order_by("date")
+    assert [f.date for f in stored] == [last + week, last + 2 * week]
+    assert stored[0].predicted_percentage == round((90.0 / 1 + 70.0 / 3) / (1 + 1 / 3), 2)
+    assert stored[1].predicted_percentage == 60.0
+
+
+@pytest.mark.django_db
+def test_station_forecasts_are_stacked_batched_and_budgeted(tmp_path, settings, monkeypatch,
+                                                             django_assert_max_num_queries):
+    import numpy as np
+    from water_levels.ml.engine import SPECS, load_series, run_forecasts
+    from water_levels.ml.fit_cache import FitCache
+
+    settings.ML_ARTIFACT_DIR = str(tmp_path)
+    settings.ML_FIT_CACHE_ENABLED = True
+    settings.ML_FIT_WORKERS = 1
+    cached = []
+    monkeypatch.setattr(FitCache, "put", lambda self, key, *a, **kw: cached.append(key))
+    # Dips on a different weekday each week, with a four-week gap for the first station.
+    first = datetime.date.today() - datetime.timedelta(weeks=60)
+    first -= datetime.timedelta(days=first.weekday())
+    stations = [
+        EAwaterStation.objects.create(station_id=f"gw{i}", name=f"GW{i}", region="north")
+        for i in range(3)
+    ]
+    for i, station in enumerate(stations):
+        weeks = 60 if i < 2 else 10
+        EAwaterLevel.objects.bulk_create(
+            EAwaterLevel(
+                station=station,
+                date=first + datetime.timedelta(weeks=w, days=w % 5),
+                value=20 + 5 * i + np.sin(w / 6) + 0.01 * w,
+            )
+            for w in range(weeks)
+            if not (i == 0 and 20 <= w < 24)
+        )
+    EAwaterLevel.objects.create(
+        station=stations[1], date=first - datetime.timedelta(days=6 * 365), value=99.0
+    )
+
+    with django_assert_max_num_queries(1):
+        prepared = load_series(SPECS["environment_agency_stations"])
+    assert sorted(prepared) == [s.pk for s in stations]
+    gappy = prepared[stations[0].pk]
+    assert len(gappy.raw) == 56 and not gappy.regular.isnull().any()
+    assert len(gappy.regular) == 60
+    assert prepared[stations[1].pk].raw["percentage"].max() < 99.0
+
+    counts = run_forecasts("environment_agency_stations", models=("REGRESSION", "ARIMA"))
+
+    assert counts == {"REGRESSION": 32, "ARIMA": 32}
+    for station in stations[:2]:
+        stored = EAwaterStationPrediction.objects.filter(station=station, model_type="ARIMA")
+        assert stored.count() == 16
+    assert not EAwaterStationPrediction.objects.filter(station=stations[2]).exists()
+    assert cached == []
+
+    assert run_forecasts("environment_agency_stations", models=("REGRESSION",), budget=1e-9) == {}
@@ -54,6 +54,11 @@ app.conf.beat_schedule = {
     'weekly-EA-stations-water-forecasts-predictions': {
         'task': 'water_levels.tasks.weekly_EA_stations_water_predictions()',
         'schedule': crontab(day_of_week='wed', hour=5, minute=0),
+    },
+    # Forecast each EA station individually once the regional forecasts are done
+    'weekly-EA-station-level-predictions': {
+        'task': 'water_levels.tasks.weekly_EA_station_level_predictions',
+        'schedule': crontab(day_of_week='wed', hour=5, minute=30),
     },
         # Fetch Scottish Water resource levels once a week on Wednesday
     'weekly-scottish-resources': {
@@ -0,0 +1,60 @@
+"""BeautifulSoup construction with a fast C-backed parser when one is installed.
+
+``make_soup`` picks the parser configured for the page's host in
+``settings.HTML_PARSERS``, else the first available of ``PARSER_PREFERENCE``,
+and falls back to the pure-Python ``html.parser`` if the chosen backend is
+missing. ``manage.py benchmark_html_parsers`` measures the candidates on
+recorded pages to fill in ``HTML_PARSERS``.
+"""
+
+import warnings
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup, FeatureNotFound
+from django.conf import settings
+
+FALLBACK_PARSER = "html.parser"
+PARSER_PREFERENCE = ("lxml", FALLBACK_PARSER)
+
+
+def _soup(markup, parser: str) -> BeautifulSoup:
+    # bs4's lxml tree builder still passes lxml >= 5 the no-op ``strip_cdata``
+    # option, which warns on every parse.
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message=".*'strip_cdata' option", category=DeprecationWarning)
+        return BeautifulSoup(markup, parser)
+
+
+@lru_cache(maxsize=None)
+def parser_available(parser: str) -> bool:
+    try:
+        _soup("", parser)
+    except FeatureNotFound:
+        return False
+    return True
+
+
+def available_parsers():
+    return [parser for parser in PARSER_PREFERENCE if parser_available(parser)]
+
+
+def parser_for(source: str = None) -> str:
+    """Return the parser to use for ``source`` (a URL or host), honouring fallbacks."""
+    configured = getattr(settings, "HTML_PARSERS", {})
+    if source:
+        host = urlsplit(source).netloc or source
+        parser = configured.get(host)
+        if parser and parser_available(parser):
+            return parser
+    parser = configured.get("default")
+    if parser and parser_available(parser):
+        return parser
+    return available_parsers()[0]
+
+
+def make_soup(markup, source: str = None, parser: str = None) -> BeautifulSoup:
+    """Parse ``markup`` with the fastest suitable backend for ``source``."""
+    if parser is None or not parser_available(parser):
+        parser = parser_for(source)
+    return _soup(markup, parser)
@@ -0,0 +1,190 @@
+"""Record real HTTP responses to fixture files and replay them offline.
+
+Every outbound call in the project goes through ``requests`` (RSS feeds are
+fetched with it and only then handed to feedparser, see ``news.views.fetch_feed``),
+so recording and replaying both hook ``HTTPAdapter.send``: scrapers, views and
+tasks run unmodified. Responses are stored one JSON file per request under
+``settings.HTTP_FIXTURES_DIR/<host>/`` keyed by method and URL, with API key
+parameters left out of both the key and the stored URL.
+
+``replay`` answers in-process; ``ReplayServer`` serves the same fixtures over a
+local socket at a configurable latency so runs include real connection costs.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+SECRET_PARAMS = {"apikey", "api_key", "key", "token"}
+DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+SERVER_HEADERS = {"date", "server"}
+
+_real_send = HTTPAdapter.send
+
+
+class FixtureNotFound(requests.ConnectionError):
+    """No recorded response exists for a request made during replay."""
+
+
+def normalise_url(url):
+    """Drop secret query parameters so fixtures neither store nor depend on them."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def fixture_path(method, url, directory=None):
+    directory = Path(directory or settings.HTTP_FIXTURES_DIR)
+    url = normalise_url(url)
+    digest = hashlib.sha1(f"{method.upper()} {url}".encode()).hexdigest()[:16]
+    host = (urlsplit(url).netloc or "local").replace(":", "_")
+    return directory / host / f"{digest}.json"
+
+
+def save_fixture(method, url, response, directory=None):
+    path = fixture_path(method, url, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(
+            {
+                "method": method.upper(),
+                "url": normalise_url(url),
+                "status": response.status_code,
+                "headers": {
+                    k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS
+                },
+                "body": base64.b64encode(response.content).decode(),
+            },
+            indent=1,
+        )
+    )
+    return path
+
+
+def load_fixture(method, url, directory=None):
+    path = fixture_path(method, url, directory)
+    if not path.exists():
+        raise FixtureNotFound(f"No fixture for {method} {normalise_url(url)} ({path})")
+    data = json.loads(path.read_text())
+    data["body"] = base64.b64decode(data["body"])
+    return data
+
+
+def _build_response(request, fixture):
+    response = requests.Response()
+    response.status_code = fixture["status"]
+    response.headers = CaseInsensitiveDict(fixture["headers"])
+    response._content = fixture["body"]
+    response.url = request.url
+    response.request = request
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+@contextmanager
+def record(directory=None):
+    """Make real requests and save every response as a fixture."""
+
+    def send(adapter, request, **kwargs):
+        response = _real_send(adapter, request, **kwargs)
+        save_fixture(request.method, request.url, response, directory)
+        return response
+
+    with mock.patch.object(HTTPAdapter, "send", send):
+        yield
+
+
+@contextmanager
+def replay(directory=None, latency=0.0):
+    """Answer every request from fixtures, sleeping ``latency`` seconds per call."""
+
+    def send(adapter, request, **kwargs):
+        fixture = load_fixture(request.method, request.url, directory)
+        if latency:
+            time.sleep(latency)
+        return _build_response(request, fixture)
+
+    with mock.patch.object(HTTPAdapter, "send", send):
+        yield
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Local HTTP server replaying fixtures for ``/replay/<quoted original url>``."""
+
+    daemon_threads = True
+
+    def __init__(self, directory=None, latency=0.0, port=0):
+        self.directory = directory
+        self.latency = latency
+        self.served = 0
+        self._count_lock = threading.Lock()
+        super().__init__(("127.0.0.1", port), _ReplayHandler)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    @contextmanager
+    def redirect(self):
+        """Send every request made inside the block to this server instead of its host."""
+
+        def send(adapter, request, **kwargs):
+            original = request.url
+            request.url = f"{self.base_url}/replay/{quote(original, safe='')}"
+            response = _real_send(adapter, request, **kwargs)
+            response.url = request.url = original
+            return response
+
+        with mock.patch.object(HTTPAdapter, "send", send):
+            yield
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    def _reply(self):
+        server = self.server
+        if not self.path.startswith("/replay/"):
+            self.send_error(404, "Unknown replay path")
+            return
+        url = unquote(self.path[len("/replay/"):])
+        try:
+            fixture = load_fixture(self.command, url, server.directory)
+        except FixtureNotFound as e:
+            self.send_error(404, str(e))
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        with server._count_lock:
+            server.served += 1
+        self.send_response(fixture["status"])
+        for name, value in fixture["headers"].items():
+            if name.lower() not in SERVER_HEADERS:
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(fixture["body"])))
+        self.end_headers()
+        self.wfile.write(fixture["body"])
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, format, *args):
+        pass
@@ -2,6 +2,7 @@
 Django settings for uk_water_tracker project.
 """
 
+import json
 import os
 from pathlib import Path
 
@@ -151,3 +152,75 @@ CELERY_BROKER_TRANSPORT_OPTIONS = {
     "fanout_prefix": True,
     "fanout_patterns": True,
 }
+
+# Environment Agency hydrology API fetch tuning
+EA_FETCH_CONCURRENCY = int(os.environ.get("EA_FETCH_CONCURRENCY", 8))
+EA_REQUESTS_PER_SECOND = float(os.environ.get("EA_REQUESTS_PER_SECOND", 10))
+EA_WRITE_CHUNK_SIZE = int(os.environ.get("EA_WRITE_CHUNK_SIZE", 2000))
+EA_READINGS_PAGE_SIZE = int(os.environ.get("EA_READINGS_PAGE_SIZE", 2000))
+
+# Yorkshire Water dataset crawl politeness budget
+YORKSHIRE_CRAWL_CONCURRENCY = int(os.environ.get("YORKSHIRE_CRAWL_CONCURRENCY", 2))
+YORKSHIRE_REQUESTS_PER_SECOND = float(os.environ.get("YORKSHIRE_REQUESTS_PER_SECOND", 2))
+
+# Recorded HTTP responses used by `manage.py http_replay`
+HTTP_FIXTURES_DIR = os.environ.get("HTTP_FIXTURES_DIR", os.path.join(BASE_DIR, "fixtures", "http"))
+
+# BeautifulSoup backend per host, e.g. {"www.stwater.co.uk": "html.parser"}; a
+# "default" key overrides the lxml-first preference. See benchmark_html_parsers.
+HTML_PARSERS = json.loads(os.environ.get("HTML_PARSERS", "{}"))
+
+# Shared scraper framework (water_levels.scraper.base): retry/backoff budget and
+# per-source concurrency limits, e.g. {"severn_trent": 1}
+SCRAPER_MAX_RETRIES = int(os.environ.get("SCRAPER_MAX_RETRIES", 3))
+SCRAPER_BACKOFF_SECONDS = float(os.environ.get("SCRAPER_BACKOFF_SECONDS", 1))
+SCRAPER_BACKOFF_MAX_SECONDS = float(os.environ.get("SCRAPER_BACKOFF_MAX_SECONDS", 30))
+SCRAPER_CONCURRENCY = json.loads(os.environ.get("SCRAPER_CONCURRENCY", "{}"))
+
+# Forecast model artifacts and the fingerprint-keyed fit cache (water_levels.ml.fit_cache)
+ML_ARTIFACT_DIR = os.environ.get("ML_ARTIFACT_DIR", os.path.join(BASE_DIR, "ml_artifacts"))
+ML_FIT_CACHE_ENABLED = os.environ.get("ML_FIT_CACHE_ENABLED", "1") == "1"
+ML_FIT_CACHE_MAX_ENTRIES = int(os.environ.get("ML_FIT_CACHE_MAX_ENTRIES", 500))
+ML_FIT_CACHE_MAX_AGE_DAYS = int(os.environ.get("ML_FIT_CACHE_MAX_AGE_DAYS", 60))
+ML_FIT_CACHE_MAX_MB = int(os.environ.get("ML_FIT_CACHE_MAX_MB", 50))
+# Processes used to fit independent series concurrently (water_levels.ml.parallel); 1 fits serially
+ML_FIT_WORKERS = int(os.environ.get("ML_FIT_WORKERS", os.cpu_count() or 1))
+
+# Start each series' ARIMA fit from its previous parameters (water_levels.ml.arima_state)
+ARIMA_WARM_START = os.environ.get("ARIMA_WARM_START", "1") == "1"
+# Extend saved ARIMA fits over new rows by Kalman filtering instead of refitting; full
+# refit after ARIMA_FULL_REFIT_DAYS, or once the mean squared standardised one-step
+# error since the last fit exceeds ARIMA_DRIFT_FACTOR
+ARIMA_INCREMENTAL_UPDATE = os.environ.get("ARIMA_INCREMENTAL_UPDATE", "1") == "1"
+ARIMA_FULL_REFIT_DAYS = int(os.environ.get("ARIMA_FULL_REFIT_DAYS", 28))
+ARIMA_DRIFT_FACTOR = float(os.environ.get("ARIMA_DRIFT_FACTOR", 3.0))
+# Per-series (p,d,q)(P,D,Q,s) selection by AIC (water_levels.ml.order_search): largest p and
+# q tried, AIC margin over the best within which screened orders survive, and days a
+# chosen order is reused before searching again. Off: every series uses ARIMA(2,1,2)
+ARIMA_ORDER_SEARCH = os.environ.get("ARIMA_ORDER_SEARCH", "1") == "1"
+ARIMA_ORDER_MAX_PQ = int(os.environ.get("ARIMA_ORDER_MAX_PQ", 3))
+ARIMA_ORDER_AIC_MARGIN = float(os.environ.get("ARIMA_ORDER_AIC_MARGIN", 4.0))
+ARIMA_ORDER_TTL_DAYS = int(os.environ.get("ARIMA_ORDER_TTL_DAYS", 30))
+
+# ENSEMBLE forecasts (water_levels.ml.ensemble): each model is weighted by the inverse of its
+# mean percentage error over this many of its latest scored forecasts per series
+ENSEMBLE_ERROR_WINDOW = int(os.environ.get("ENSEMBLE_ERROR_WINDOW", 8))
+
+# Per-station EA forecasts (engine spec "environment_agency_stations"): seconds a weekly run
+# may spend; each model gets an even share of what is left, LSTM stopping between epochs
+# and ARIMA between chunks
+EA_STATION_BUDGET_SECONDS = int(os.environ.get("EA_STATION_BUDGET_SECONDS", 1800))
+
+# Persisted LSTM models (water_levels.ml.general_lstm.lstm): fine-tune epochs on
+# new data, days between scheduled full retrains, and the loss ratio over the
+# last full training that counts as drift
+LSTM_FINE_TUNE_EPOCHS = int(os.environ.get("LSTM_FINE_TUNE_EPOCHS", 5))
+LSTM_FULL_RETRAIN_DAYS = int(os.environ.get("LSTM_FULL_RETRAIN_DAYS", 28))
+LSTM_DRIFT_FACTOR = float(os.environ.get("LSTM_DRIFT_FACTOR", 3.0))
+# Train one LSTM per provider across all its reservoirs/areas/regions instead of one per series
+LSTM_GLOBAL_MODELS = os.environ.get("LSTM_GLOBAL_MODELS", "1") == "1"
+# Most pooled windows a full LSTM training uses (sampled across series); bounds global
+# models over thousands of EA stations
+LSTM_MAX_TRAIN_WINDOWS = int(os.environ.get("LSTM_MAX_TRAIN_WINDOWS", 50000))
+# "recursive" rolls a one-step LSTM forward; "direct" trains it to output the whole horizon
+LSTM_FORECAST_MODE = os.environ.get("LSTM_FORECAST_MODE", "recursive")
@@ -1,5 +1,5 @@
 from django_filters import rest_framework as filters
-from .models import EAwaterPrediction
+from .models import EAwaterPrediction, EAwaterStationPrediction
 
 
 class EAwaterPredictionFilter(filters.FilterSet):
@@ -9,3 +9,13 @@ class EAwaterPredictionFilter(filters.FilterSet):
     class Meta:
         model = EAwaterPrediction
         fields = ["region", "model_type", "date"]
+
+
+class EAwaterStationPredictionFilter(filters.FilterSet):
+    station_id = filters.CharFilter(field_name="station__station_id")
+    region = filters.CharFilter(field_name="station__region", lookup_expr="iexact")
+    model_type = filters.CharFilter(field_name="model_type", lookup_expr="iexact")
+
+    class Meta:
+        model = EAwaterStationPrediction
+        fields = ["station", "station_id", "region", "model_type", "date"]
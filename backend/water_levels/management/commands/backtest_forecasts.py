@@ -30,7 +30,9 @@ class Command(BaseCommand):
         parser.add_argument("--step", type=int, default=1,
                             help="Advance origins by this step (speed ↑ if >1).")
         parser.add_argument("--fast", action="store_true",
-                            help="Fast mode for ARIMA/LSTM (small grids, lower maxiter).")
+                            help="Fast mode for ARIMA/LSTM (fixed ARIMA(1,1,1) order, lower maxiter).")
+        parser.add_argument("--lstm_direct", action="store_true",
+                            help="Train LSTMs to output the whole horizon instead of rolling one step forward.")
         parser.add_argument("--maxiter", type=int, default=None,
                             help="Override ARIMA optimizer maxiter (default 60; fast=30).")
         parser.add_argument("--only", default=None,
@@ -54,6 +56,7 @@ class Command(BaseCommand):
             step=max(1, int(opts["step"])),
             seasonal_period=52,          
             lstm_window=12,
+            lstm_direct=bool(opts["lstm_direct"]),
             fast=bool(opts["fast"]),
             resample_mode=opts["resample"],
             arima_maxiter=(30 if opts["fast"] else (opts["maxiter"] or 60)),
@@ -101,6 +104,7 @@ class Command(BaseCommand):
                 run_cfg = replace(cfg, initial_points=adjusted_initial, seasonal_period=ds.seasonal_period)
             else:
                 run_cfg = replace(cfg, seasonal_period=ds.seasonal_period)
+            run_cfg = replace(run_cfg, arima_order_key=f"{ds.label}@{run_cfg.initial_points}")
 
             results = {}
             details = {}
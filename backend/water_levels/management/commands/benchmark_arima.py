@@ -0,0 +1,85 @@
+from __future__ import annotations
+from django.core.management.base import BaseCommand
+import time
+
+import numpy as np
+import pandas as pd
+
+from water_levels.ml.forecasting import _fit_arima, _update_arima
+from water_levels.ml.order_search import search_orders
+
+
+def _synthetic(n_series: int, length: int, seed: int = 0) -> list:
+    """Weekly reservoir-like levels: annual cycle, random-walk drift and noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(length)
+    index = pd.date_range("2019-01-07", periods=length, freq="W-MON")
+    return [
+        pd.Series(
+            50 + 20 * np.sin(2 * np.pi * t / 52 + rng.uniform(0, 2 * np.pi))
+            + np.cumsum(rng.normal(0, 1, length)),
+            index=index,
+        )
+        for _ in range(n_series)
+    ]
+
+
+class Command(BaseCommand):
+    help = ("Compare ARIMA runs after one new weekly row on synthetic series: a cold start, "
+            "a warm start from last week's parameters, and an incremental update by filtering.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", type=int, default=10,
+                            help="Number of synthetic series (default 10).")
+        parser.add_argument("--length", type=int, default=260,
+                            help="Points per series (default 260, ~5 years weekly).")
+        parser.add_argument("--steps", type=int, default=4,
+                            help="Forecast horizon (default 4).")
+        parser.add_argument("--order", default="2,1,2",
+                            help="ARIMA order p,d,q (default %(default)s).")
+        parser.add_argument("--search", action="store_true",
+                            help="Also time the pruned (p,d,q)(P,D,Q,s) order search on the series.")
+        parser.add_argument("--period", type=int, default=52,
+                            help="Seasonal period for --search (default 52).")
+
+    def handle(self, *args, **opts):
+        order = tuple(int(x) for x in opts["order"].split(","))
+        steps = opts["steps"]
+        series = _synthetic(opts["series"], opts["length"] + 1)
+
+        # Last week's fits supply the warm-start parameters for this week's.
+        previous = [
+            {"params": _fit_arima(s.iloc[:-1], steps, order)["params"], "nobs": len(s) - 1}
+            for s in series
+        ]
+        paths = {
+            "cold start": lambda s, prev: _fit_arima(s, steps, order),
+            "warm start": lambda s, prev: _fit_arima(s, steps, order, start_params=prev["params"]),
+            "update": lambda s, prev: _update_arima(s, steps, order, prev, drift_factor=np.inf),
+        }
+        results = {}
+        for label, fn in paths.items():
+            t0 = time.perf_counter()
+            fits = [fn(s, prev) for s, prev in zip(series, previous)]
+            seconds = time.perf_counter() - t0
+            results[label] = fits
+            iterations = [f["iterations"] for f in fits if f["iterations"] is not None]
+            fallbacks = sum(f["fallback"] for f in fits)
+            self.stdout.write(
+                f"{label:<12} {seconds * 1000 / len(fits):8.1f} ms/series  "
+                f"{np.mean(iterations) if iterations else 0:5.1f} iterations avg  {fallbacks} fell back"
+            )
+        for label in ("warm start", "update"):
+            gap = max(
+                float(np.abs(c["forecast"] - other["forecast"]).max())
+                for c, other in zip(results["cold start"], results[label])
+            )
+            self.stdout.write(f"largest cold/{label} forecast difference {gap:.4f}")
+        if opts["search"]:
+            t0 = time.perf_counter()
+            found = search_orders(dict(enumerate(series)), opts["period"], label="benchmark search")
+            seconds = time.perf_counter() - t0
+            for i, (best, seasonal, aic) in sorted(found.items()):
+                self.stdout.write(f"series {i:<3} ARIMA{best}{seasonal if seasonal[3] else ''}  AIC {aic:.1f}")
+            self.stdout.write(f"order search  {seconds / len(series):.1f} s/series")
+        self.stdout.write(self.style.SUCCESS(f"{len(series)} series, ARIMA{order}"))
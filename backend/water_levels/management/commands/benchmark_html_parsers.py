@@ -0,0 +1,74 @@
+from __future__ import annotations
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from pathlib import Path
+from urllib.parse import urlsplit
+import base64, json, time
+
+from uk_water_tracker.html_parsing import PARSER_PREFERENCE, make_soup, parser_available
+
+
+def _html_fixtures(directory: Path):
+    """Yield ``(host, url, body)`` for every recorded HTML response."""
+    for path in sorted(directory.glob("*/*.json")):
+        data = json.loads(path.read_text())
+        content_type = next(
+            (v for k, v in data["headers"].items() if k.lower() == "content-type"), ""
+        )
+        if "html" not in content_type.lower():
+            continue
+        yield urlsplit(data["url"]).netloc, data["url"], base64.b64decode(data["body"])
+
+
+def _time_parse(body: bytes, parser: str, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        make_soup(body, parser=parser).get_text(" ", strip=True)
+    return (time.perf_counter() - t0) / repeat
+
+
+class Command(BaseCommand):
+    help = ("Time each available BeautifulSoup backend on recorded HTML pages, per host, "
+            "and suggest an HTML_PARSERS setting.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=None,
+                            help="Fixture directory (default settings.HTTP_FIXTURES_DIR).")
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="Parses per page and backend (default 5).")
+        parser.add_argument("--parsers", nargs="*", default=list(PARSER_PREFERENCE),
+                            help="Backends to compare (default: %(default)s).")
+
+    def handle(self, *args, **opts):
+        directory = Path(opts["dir"] or settings.HTTP_FIXTURES_DIR)
+        parsers = [p for p in opts["parsers"] if parser_available(p)]
+        for missing in set(opts["parsers"]) - set(parsers):
+            self.stdout.write(self.style.WARNING(f"[skip] parser '{missing}' is not installed"))
+        if not parsers:
+            raise CommandError("None of the requested parsers are installed.")
+
+        timings: dict[str, dict[str, float]] = {}
+        pages = 0
+        for host, url, body in _html_fixtures(directory):
+            pages += 1
+            per_parser = timings.setdefault(host, {p: 0.0 for p in parsers})
+            row = []
+            for parser in parsers:
+                seconds = _time_parse(body, parser, max(1, opts["repeat"]))
+                per_parser[parser] += seconds
+                row.append(f"{parser} {seconds*1000:.1f} ms")
+            self.stdout.write(f"{url} ({len(body)/1024:.0f} KiB): " + " | ".join(row))
+
+        if not pages:
+            raise CommandError(
+                f"No recorded HTML pages under {directory}; run `manage.py http_replay record` first.")
+
+        suggested = {}
+        for host, per_parser in timings.items():
+            fastest = min(per_parser, key=per_parser.get)
+            slowest = max(per_parser.values())
+            suggested[host] = fastest
+            self.stdout.write(self.style.SUCCESS(
+                f"[{host}] fastest: {fastest} ({per_parser[fastest]*1000:.1f} ms/page set, "
+                f"{slowest / per_parser[fastest]:.1f}x vs slowest)"))
+        self.stdout.write(f"HTML_PARSERS={json.dumps(suggested)}")
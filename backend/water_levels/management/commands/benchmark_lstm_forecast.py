@@ -0,0 +1,104 @@
+from __future__ import annotations
+from django.core.management.base import BaseCommand
+import time
+
+import numpy as np
+
+from water_levels.ml.general_lstm.lstm import (
+    WINDOW, build_model, compiled_step, make_windows, rollout,
+)
+from water_levels.ml.general_lstm.numpy_lstm import NumpyLSTM
+
+
+def _synthetic(n_series: int, length: int, seed: int = 0) -> np.ndarray:
+    """Weekly reservoir-like curves scaled to [0, 1]: annual cycle, drift and noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(length)
+    phase = rng.uniform(0, 2 * np.pi, (n_series, 1))
+    y = 0.5 + 0.35 * np.sin(2 * np.pi * t / 52 + phase) + rng.normal(0, 0.03, (n_series, length))
+    return np.clip(y, 0, 1)
+
+
+def _predict_loop(model, batch, steps):
+    """The previous forecast path: ``model.predict`` on one window per step."""
+    preds = np.empty((len(batch), steps))
+    for i, window in enumerate(batch):
+        x = window[None]
+        for step in range(steps):
+            p = model.predict(x, verbose=0)
+            preds[i, step] = p[0, 0]
+            x = np.concatenate([x[:, 1:], p.reshape(1, 1, 1)], axis=1)
+    return preds
+
+
+def _batched_predict_loop(model, batch, steps):
+    """One ``model.predict`` per step for the whole batch."""
+    preds = np.empty((len(batch), steps))
+    x = batch
+    for step in range(steps):
+        p = model.predict(x, verbose=0)
+        preds[:, step] = p[:, 0]
+        x = np.concatenate([x[:, 1:], p.reshape(-1, 1, 1)], axis=1)
+    return preds
+
+
+class Command(BaseCommand):
+    help = ("Compare LSTM forecast paths on synthetic series: the per-step predict loop, "
+            "a compiled recursive step, a direct multi-horizon model and the NumPy runtime.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", type=int, default=8,
+                            help="Number of series forecast together (default 8).")
+        parser.add_argument("--length", type=int, default=260,
+                            help="Points per series (default 260, ~5 years weekly).")
+        parser.add_argument("--steps", type=int, default=16,
+                            help="Forecast horizon (default 16).")
+        parser.add_argument("--epochs", type=int, default=20,
+                            help="Training epochs for both models (default 20).")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Timed repetitions per inference path (default 3).")
+
+    def _time(self, fn, repeat):
+        fn()  # warm-up: graph tracing and first-call allocation
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            out = fn()
+        return (time.perf_counter() - t0) / repeat, out
+
+    def handle(self, *args, **opts):
+        steps, repeat = opts["steps"], max(1, opts["repeat"])
+        data = _synthetic(opts["series"], opts["length"] + steps)
+        history, actual = data[:, :-steps], data[:, -steps:]
+        batch = history[:, -WINDOW:, None]
+
+        models = {}
+        for horizon in (1, steps):
+            parts = [make_windows(row.reshape(-1, 1), horizon=horizon) for row in history]
+            X = np.concatenate([p[0] for p in parts])
+            y = np.concatenate([p[1] for p in parts])
+            model = build_model(horizon=horizon)
+            t0 = time.perf_counter()
+            model.fit(X, y, epochs=opts["epochs"], verbose=0)
+            models[horizon] = model
+            self.stdout.write(
+                f"train horizon={horizon}: {len(X)} windows, {time.perf_counter() - t0:.1f} s")
+
+        step_fn = compiled_step(models[1])
+        runtimes = {horizon: NumpyLSTM.from_keras(model) for horizon, model in models.items()}
+        paths = {
+            "predict loop (per series)": lambda: _predict_loop(models[1], batch, steps),
+            "predict loop (batched)": lambda: _batched_predict_loop(models[1], batch, steps),
+            "compiled recursive step": lambda: rollout(models[1], batch, steps, step_fn),
+            "direct multi-horizon": lambda: rollout(models[steps], batch, steps),
+            "numpy recursive": lambda: runtimes[1].rollout(batch, steps),
+            "numpy direct": lambda: runtimes[steps].rollout(batch, steps),
+        }
+        baseline = None
+        for label, fn in paths.items():
+            seconds, preds = self._time(fn, repeat)
+            baseline = baseline or seconds
+            mae = float(np.abs(preds - actual).mean())
+            self.stdout.write(
+                f"{label:<28} {seconds*1000:9.1f} ms  {baseline / seconds:6.1f}x  MAE {mae:.4f}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{opts['series']} series x {steps} steps; MAE on the held-out last {steps} points (scaled)."))
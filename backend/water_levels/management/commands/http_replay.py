@@ -0,0 +1,92 @@
+from __future__ import annotations
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.utils.module_loading import import_string
+import json, time
+
+from uk_water_tracker.http_replay import ReplayServer, record, replay
+
+
+def _run_target(target: str, kwargs: dict):
+    """Call a dotted-path callable, or GET a local API path starting with '/'."""
+    if target.startswith("/"):
+        response = Client().get(target, HTTP_HOST="localhost")
+        return f"HTTP {response.status_code}"
+    return import_string(target)(**kwargs)
+
+
+class Command(BaseCommand):
+    help = ("Record external HTTP responses for scrapers/views, or replay them offline "
+            "to time parse and write throughput without the network.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["record", "run", "serve"],
+                            help="record: hit the network and save fixtures; run: replay targets; "
+                                 "serve: start a stand-alone replay server.")
+        parser.add_argument("targets", nargs="*",
+                            help="Dotted callables (e.g. water_levels.scraper.severn_trent."
+                                 "severn_trent_scrapper.extract_severn_trent_water_levels) "
+                                 "or API paths such as /api/news/water/.")
+        parser.add_argument("--dir", default=None,
+                            help="Fixture directory (default settings.HTTP_FIXTURES_DIR).")
+        parser.add_argument("--latency", type=float, default=0.0,
+                            help="Seconds of simulated latency per replayed response.")
+        parser.add_argument("--server", action="store_true",
+                            help="Replay through a local HTTP server instead of in-process.")
+        parser.add_argument("--port", type=int, default=8765,
+                            help="Port for 'serve' (default 8765).")
+        parser.add_argument("--repeat", type=int, default=1,
+                            help="Run each target this many times and report the mean.")
+        parser.add_argument("--kwargs", default="{}",
+                            help='JSON keyword arguments for callable targets, e.g. \'{"force": true}\'.')
+
+    def handle(self, *args, **opts):
+        action = opts["action"]
+        directory = opts["dir"]
+        kwargs = json.loads(opts["kwargs"])
+
+        if action == "serve":
+            server = ReplayServer(directory, latency=opts["latency"], port=opts["port"])
+            self.stdout.write(self.style.NOTICE(
+                f"Replaying fixtures on {server.base_url}/replay/<quoted url> (Ctrl+C to stop)"))
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+            return
+
+        if not opts["targets"]:
+            raise CommandError("Give at least one target to record or run.")
+
+        if action == "record":
+            with record(directory):
+                for target in opts["targets"]:
+                    result = _run_target(target, kwargs)
+                    self.stdout.write(self.style.SUCCESS(f"[recorded] {target} → {result}"))
+            return
+
+        server = None
+        if opts["server"]:
+            server = ReplayServer(directory, latency=opts["latency"]).start()
+            context = server.redirect
+        else:
+            context = lambda: replay(directory, latency=opts["latency"])
+
+        try:
+            for target in opts["targets"]:
+                timings = []
+                result = None
+                for _ in range(max(1, opts["repeat"])):
+                    with context():
+                        t0 = time.perf_counter()
+                        result = _run_target(target, kwargs)
+                        timings.append(time.perf_counter() - t0)
+                mean = sum(timings) / len(timings)
+                self.stdout.write(self.style.SUCCESS(
+                    f"[ok] {target} → {result} | mean {mean*1000:.1f} ms over {len(timings)} run(s)"))
+        finally:
+            if server:
+                self.stdout.write(f"Replay server answered {server.served} request(s)")
+                server.stop()
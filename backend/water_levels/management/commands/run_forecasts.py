@@ -0,0 +1,32 @@
+from __future__ import annotations
+from django.core.management.base import BaseCommand, CommandError
+import time
+
+from water_levels.ml.engine import MODEL_TYPES, SPECS, run_forecasts
+
+
+class Command(BaseCommand):
+    help = ("Run the forecasting engine: load each provider's series once, fit every requested "
+            "model and write all forecasts in one pass.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("providers", nargs="*",
+                            help=f"Providers to forecast (default: all of {', '.join(SPECS)}).")
+        parser.add_argument("--models", default=",".join(MODEL_TYPES),
+                            help="Comma list of models (default: %(default)s).")
+        parser.add_argument("--budget", type=float, default=None,
+                            help="Seconds per provider; models run in --models order and are "
+                                 "skipped once it is spent.")
+
+    def handle(self, *args, **opts):
+        providers = opts["providers"] or list(SPECS)
+        models = tuple(m.strip().upper() for m in opts["models"].split(",") if m.strip())
+        unknown = (set(providers) - set(SPECS)) | (set(models) - set(MODEL_TYPES))
+        if unknown:
+            raise CommandError(f"Unknown provider(s)/model(s) {sorted(unknown)}")
+
+        for name in providers:
+            t0 = time.perf_counter()
+            counts = run_forecasts(name, models=models, budget=opts["budget"])
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: {sum(counts.values())} forecast rows in {time.perf_counter() - t0:.1f}s"))
@@ -0,0 +1,52 @@
+from __future__ import annotations
+from django.core.management.base import BaseCommand, CommandError
+import importlib, inspect, json
+
+from water_levels.scraper.base import SCRAPERS
+
+SCRAPER_MODULES = [
+    "water_levels.scraper.environment_agency.EA_Stations_scraper",
+    "water_levels.scraper.scottish_water.scottish_water_scrapper",
+    "water_levels.scraper.severn_trent.severn_trent_scrapper",
+    "water_levels.scraper.southern_water.southern_water_scrapper",
+    "water_levels.scraper.yorkshire.yorkshire_pdf_scraper",
+]
+
+
+class Command(BaseCommand):
+    help = ("Run provider scrapers through the shared scraper base and print a table of "
+            "fetch/parse/write timings, requests, retries and row counts, slowest first.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("sources", nargs="*",
+                            help="Scraper sources to run (default: all except the EA history backfill).")
+        parser.add_argument("--kwargs", default="{}",
+                            help='JSON keyword arguments for the scrapes that accept them, e.g. \'{"force": true}\'.')
+
+    def handle(self, *args, **opts):
+        for module in SCRAPER_MODULES:
+            importlib.import_module(module)
+        kwargs = json.loads(opts["kwargs"])
+        sources = opts["sources"] or [s for s in SCRAPERS if s != "environment_agency_history"]
+        unknown = set(sources) - set(SCRAPERS)
+        if unknown:
+            raise CommandError(f"Unknown source(s) {sorted(unknown)}; choose from {sorted(SCRAPERS)}")
+
+        results = []
+        for source in sources:
+            scraper = SCRAPERS[source]()
+            accepted = inspect.signature(scraper.scrape).parameters
+            try:
+                scraper.run(**{k: v for k, v in kwargs.items() if k in accepted})
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"[error] {source}: {e}"))
+            results.append(scraper.result)
+
+        self.stdout.write(f"{'source':<28}{'status':<11}{'wall s':>8}{'fetch s':>9}{'parse s':>9}"
+                          f"{'write s':>9}{'reqs':>6}{'retry':>6}{'fetched':>9}{'written':>9}")
+        for r in sorted(results, key=lambda r: r.seconds, reverse=True):
+            t = r.timings
+            self.stdout.write(
+                f"{r.source:<28}{r.status:<11}{r.seconds:>8.2f}{t.get('fetch', 0):>9.2f}"
+                f"{t.get('parse', 0):>9.2f}{t.get('write', 0):>9.2f}{r.requests:>6}{r.retries:>6}"
+                f"{r.rows_fetched:>9}{r.rows_written:>9}")
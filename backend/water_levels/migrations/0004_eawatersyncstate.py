@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water_levels', '0003_restore_ea_level_fk_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EAwaterSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('measure', models.CharField(max_length=255)),
+                ('last_reading_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_states', to='water_levels.eawaterstation')),
+            ],
+            options={
+                'unique_together': {('station', 'measure')},
+            },
+        ),
+    ]
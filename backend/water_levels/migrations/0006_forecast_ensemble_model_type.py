@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water_levels', '0005_scraperpagecache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scottishwaterforecast',
+            name='model_type',
+            field=models.CharField(choices=[('ARIMA', 'ARIMA'), ('LSTM', 'LSTM'), ('REGRESSION', 'REGRESSION'), ('ENSEMBLE', 'ENSEMBLE')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='scottishwaterregionalforecast',
+            name='model_type',
+            field=models.CharField(choices=[('ARIMA', 'ARIMA'), ('LSTM', 'LSTM'), ('REGRESSION', 'REGRESSION'), ('ENSEMBLE', 'ENSEMBLE')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='severntrentreservoirforecast',
+            name='model_type',
+            field=models.CharField(choices=[('ARIMA', 'ARIMA'), ('LSTM', 'LSTM'), ('REGRESSION', 'REGRESSION'), ('ENSEMBLE', 'ENSEMBLE')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='southernwaterreservoirforecast',
+            name='model_type',
+            field=models.CharField(choices=[('ARIMA', 'ARIMA'), ('LSTM', 'LSTM'), ('REGRESSION', 'REGRESSION'), ('ENSEMBLE', 'ENSEMBLE')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='yorkshirewaterprediction',
+            name='model_type',
+            field=models.CharField(choices=[('ARIMA', 'ARIMA'), ('LSTM', 'LSTM'), ('REGRESSION', 'REGRESSION'), ('ENSEMBLE', 'ENSEMBLE')], max_length=10),
+        ),
+    ]
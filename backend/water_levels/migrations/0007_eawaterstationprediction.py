@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('water_levels', '0006_forecast_ensemble_model_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EAwaterStationPrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_type', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('predicted_value', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='predictions', to='water_levels.eawaterstation')),
+            ],
+            options={
+                'unique_together': {('station', 'model_type', 'date')},
+            },
+        ),
+    ]
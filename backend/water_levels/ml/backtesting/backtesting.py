@@ -7,6 +7,8 @@ from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+from water_levels.ml.harmonic_regression import harmonic_forecast
+
 warnings.filterwarnings("ignore", category=UserWarning)
 
 
@@ -56,67 +58,62 @@ def _resample_series(s: pd.Series, target: str) -> pd.Series:
     return s.dropna()
 
 
-def fit_forecast_arima(train: pd.Series, h: int, seasonal_period: Optional[int], maxiter: int, fast: bool) -> np.ndarray:
-    non_seasonal = [(1,1,1)] if fast else [(1,1,0),(0,1,1),(1,1,1)]
-    seasonal = []
-    if seasonal_period and len(train) >= 2*seasonal_period and not fast:
-        seasonal = [(1,0,1, seasonal_period)]
-    best_aic, best_res = np.inf, None
-    for (p,d,q) in non_seasonal:
-        if seasonal:
-            for (P,D,Q,s) in seasonal:
-                try:
-                    mod = SARIMAX(train,
-                                  order=(p,d,q),
-                                  seasonal_order=(P,D,Q,s),
-                                  enforce_stationarity=False,
-                                  enforce_invertibility=False)
-                    res = mod.fit(disp=False, method="lbfgs", maxiter=maxiter, cov_type="none")
-                    if res.aic < best_aic and np.isfinite(res.aic):
-                        best_aic, best_res = res.aic, res
-                except Exception:
-                    continue
-        else:
-            try:
-                mod = SARIMAX(train,
-                              order=(p,d,q),
-                              enforce_stationarity=False,
-                              enforce_invertibility=False)
-                res = mod.fit(disp=False, method="lbfgs", maxiter=maxiter, cov_type="none")
-                if res.aic < best_aic and np.isfinite(res.aic):
-                    best_aic, best_res = res.aic, res
-            except Exception:
-                continue
-    if best_res is None:
+def select_arima_order(train: pd.Series, cfg: "BacktestConfig"):
+    """``((p,d,q), (P,D,Q,s))`` for a dataset's backtest, from the order search.
+
+    With ``cfg.arima_order_key`` the choice is cached (``order_search``), so
+    reruns within ``ARIMA_ORDER_TTL_DAYS`` do not search again. Fast mode skips
+    the search and uses ARIMA(1,1,1).
+    """
+    if cfg.fast:
+        return (1, 1, 1), (0, 0, 0, 0)
+    from water_levels.ml.order_search import select_orders
+    name = cfg.arima_order_key or "series"
+    chosen = select_orders({name: train}, cfg.seasonal_period, key="backtest" if cfg.arima_order_key else None,
+                           maxiter=cfg.arima_maxiter, label=f"backtest order search {name}")
+    return chosen.get(name, ((1, 1, 1), (0, 0, 0, 0)))
+
+
+def fit_forecast_arima(train: pd.Series, h: int, seasonal_period: Optional[int], maxiter: int, fast: bool,
+                       order=None) -> np.ndarray:
+    """Forecast ``h`` steps with ``order`` = ``((p,d,q), (P,D,Q,s))``, searching for one if not given."""
+    if order is None:
+        order = select_arima_order(train, BacktestConfig(seasonal_period=seasonal_period,
+                                                         arima_maxiter=maxiter, fast=fast))
+    (p, d, q), seasonal = order
+    try:
+        mod = SARIMAX(train,
+                      order=(p, d, q),
+                      seasonal_order=seasonal,
+                      enforce_stationarity=False,
+                      enforce_invertibility=False)
+        res = mod.fit(disp=False, method="lbfgs", maxiter=maxiter, cov_type="none")
+    except Exception:
+        res = None
+    if res is None or not np.isfinite(res.aic):
         last = float(train.iloc[-1])
         return np.array([last]*h, dtype="float64")
-    return best_res.get_forecast(steps=h).predicted_mean.values
+    return res.get_forecast(steps=h).predicted_mean.values
 
 def fit_forecast_regression(train: pd.Series, h: int, seasonal_period: int) -> np.ndarray:
-    t = np.arange(len(train))
-    X = np.column_stack([np.ones_like(t), t,
-                         np.sin(2*np.pi*t/seasonal_period),
-                         np.cos(2*np.pi*t/seasonal_period)])
-    beta = np.linalg.lstsq(X, train.values, rcond=None)[0]
-    tf = np.arange(len(train), len(train)+h)
-    Xf = np.column_stack([np.ones_like(tf), tf,
-                          np.sin(2*np.pi*tf/seasonal_period),
-                          np.cos(2*np.pi*tf/seasonal_period)])
-    return (Xf @ beta).astype("float64")
-
-def fit_forecast_lstm(train: pd.Series, h: int, window: int = 12, fast: bool = False) -> np.ndarray:
+    return harmonic_forecast([train.values], h, seasonal_period)[0]
+
+def fit_forecast_lstm(train: pd.Series, h: int, window: int = 12, fast: bool = False,
+                      direct: bool = False) -> np.ndarray:
+    """One-step LSTM rolled forward ``h`` times, or with ``direct`` a model emitting all ``h`` steps."""
     from sklearn.preprocessing import MinMaxScaler
     scaler = MinMaxScaler()
     y = train.values.reshape(-1,1)
     y_scaled = scaler.fit_transform(y)
-    if len(y_scaled) <= window + 2:
+    out = h if direct else 1
+    if len(y_scaled) <= window + out + 1:
         last = float(train.iloc[-1])
         return np.array([last]*h, dtype="float64")
 
     Xs, ys = [], []
-    for i in range(window, len(y_scaled)):
+    for i in range(window, len(y_scaled) - out + 1):
         Xs.append(y_scaled[i-window:i, 0])
-        ys.append(y_scaled[i, 0])
+        ys.append(y_scaled[i:i+out, 0])
     Xs = np.array(Xs).reshape(-1, window, 1)
     ys = np.array(ys)
 
@@ -141,21 +138,17 @@ def fit_forecast_lstm(train: pd.Series, h: int, window: int = 12, fast: bool = F
     model = Sequential([
         LSTM(50, input_shape=(window,1), return_sequences=False),
         Dropout(0.2),
-        Dense(1)
+        Dense(out)
     ])
     model.compile(optimizer="adam", loss="mse")
     es = EarlyStopping(patience=(5 if fast else 10), restore_best_weights=True, monitor="val_loss")
     model.fit(Xs, ys, epochs=(60 if fast else 200), batch_size=32, verbose=0, validation_split=0.2, callbacks=[es])
 
-    preds_scaled = []
-    last_seq = y_scaled[-window:, 0].copy()
-    for _ in range(h):
-        x = last_seq.reshape(1, window, 1)
-        p = model.predict(x, verbose=0)[0,0]
-        preds_scaled.append(p)
-        last_seq = np.r_[last_seq[1:], p]
+    # Score with the NumPy runtime: one small window does not need a traced TF graph.
+    from water_levels.ml.general_lstm.numpy_lstm import NumpyLSTM
+    preds_scaled = NumpyLSTM.from_keras(model).rollout(y_scaled[-window:].reshape(1, window, 1), h)[0]
 
-    preds = scaler.inverse_transform(np.array(preds_scaled).reshape(-1,1))[:,0]
+    preds = scaler.inverse_transform(preds_scaled.reshape(-1,1))[:,0]
     return preds.astype("float64")
 
 
@@ -166,9 +159,11 @@ class BacktestConfig:
     step: int = 1
     seasonal_period: int = 52
     lstm_window: int = 12
+    lstm_direct: bool = False
     fast: bool = False
     resample_mode: str = "auto"
     arima_maxiter: int = 60
+    arima_order_key: Optional[str] = None
 
 def expanding_backtest(series: pd.Series, cfg: BacktestConfig, model_name: str):
     y = series.dropna()
@@ -176,17 +171,29 @@ def expanding_backtest(series: pd.Series, cfg: BacktestConfig, model_name: str):
         return pd.DataFrame(), pd.DataFrame()
 
     origins = range(cfg.initial_points, len(y) - max(cfg.horizons) + 1, cfg.step)
+    if model_name == "REGRESSION":
+        # Every origin's training prefix is fitted in one batched solve.
+        batched = harmonic_forecast([y.values[:o] for o in origins], max(cfg.horizons), cfg.seasonal_period)
+    if model_name == "ARIMA":
+        # One order for every origin, chosen on the first training window only so
+        # nothing after an origin informs its forecast.
+        arima_order = select_arima_order(y.iloc[:cfg.initial_points], cfg)
     rows = []
-    for o in origins:
+    for k, o in enumerate(origins):
         y_tr = y.iloc[:o]
         origin_ts = y.index[o-1]
+        if model_name == "ARIMA":
+            # One fit per origin covers every horizon.
+            arima_pred = fit_forecast_arima(y_tr, max(cfg.horizons), cfg.seasonal_period,
+                                            cfg.arima_maxiter, cfg.fast, order=arima_order)
         for h in cfg.horizons:
             if model_name == "ARIMA":
-                yhat = fit_forecast_arima(y_tr, h, cfg.seasonal_period, cfg.arima_maxiter, cfg.fast)
+                yhat = arima_pred
             elif model_name == "LSTM":
-                yhat = fit_forecast_lstm(y_tr, h, window=cfg.lstm_window, fast=cfg.fast)
+                yhat = fit_forecast_lstm(y_tr, h, window=cfg.lstm_window, fast=cfg.fast,
+                                         direct=cfg.lstm_direct)
             elif model_name == "REGRESSION":
-                yhat = fit_forecast_regression(y_tr, h, cfg.seasonal_period)
+                yhat = batched[k]
             else:
                 raise ValueError("Unknown model")
 
@@ -0,0 +1,433 @@
+"""One forecasting pass per provider: load each series once, run every model on it.
+
+A ``ForecastSpec`` describes where a provider's readings live, how they are
+regularised, and where and how its forecasts are stored. ``run_forecasts``
+reads the whole level table in one query and splits it into series
+(per reservoir/area/region where the provider has several). Each series is
+regularised once and handed to ARIMA, LSTM and REGRESSION in turn. All
+forecasts are then written in one transaction, as one conflict-aware bulk
+insert per model. ENSEMBLE runs last: it combines the stored forecasts,
+weighted by each model's recent error in the accuracy table (see ``ensemble``).
+
+Providers with thousands of series (one per EA groundwater station) are
+loaded ``stacked``: the rows are binned into one date x series matrix and
+resampled and interpolated as a whole, so no per-series pandas work happens
+on load. Every model already fits all series together. REGRESSION is one
+batched least-squares solve, ARIMA goes through the process pool, and the
+LSTM is one global model. Given a time ``budget``, ``run_forecasts`` gives
+each model a share of it: ARIMA stops between chunks of series, stalest
+series first, and LSTM training between epochs. Every stage prints its
+throughput.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+from water_levels.utils import upsert_forecasts
+
+BASE_MODEL_TYPES = ("ARIMA", "LSTM", "REGRESSION")
+MODEL_TYPES = BASE_MODEL_TYPES + ("ENSEMBLE",)
+
+# Series per ARIMA pool run when working to a deadline; the deadline is checked between runs.
+ARIMA_BUDGET_CHUNK = 256
+
+
+@dataclass(frozen=True)
+class ForecastSpec:
+    name: str
+    model_path: str               # level table, "app.Model"
+    date_field: str
+    value_field: str
+    forecast_path: str            # forecast table, "app.Model"
+    forecast_field: str           # predicted value column on the forecast table
+    group_field: Optional[str] = None          # lookup splitting the table into series
+    forecast_group_field: Optional[str] = None
+    freq: str = "W-MON"
+    resample: bool = False        # resample + ffill instead of asfreq (irregular weekly dates)
+    interpolate: bool = True
+    aggregate: bool = False       # average readings sharing a date (several stations per region)
+    anchor_regular: bool = False  # ARIMA/REGRESSION step on from the regularised series' last label
+    steps: int = 4
+    seasonal_period: int = 52
+    monthly: bool = False         # forecast dates step by months rather than weeks
+    min_points: int = 12
+    lstm_min_points: int = 12
+    lstm_regular: bool = False    # train the LSTM on the regularised series, not the raw rows
+    lstm_global: bool = False     # one shared LSTM even when LSTM_GLOBAL_MODELS is off
+    stacked: bool = False         # bin all series into one date x series matrix (raw = binned means)
+    history_days: Optional[int] = None    # only read rows this recent
+    order_search: bool = True     # per-series ARIMA order search when ARIMA_ORDER_SEARCH is on
+    round_to: Optional[int] = 2
+    forecast_defaults: dict = field(default_factory=dict)
+    lstm_key: str = ""
+    accuracy_path: Optional[str] = None   # per-model error table, grouped like the forecasts
+    accuracy_error_field: str = "percentage_error"
+
+
+SPECS = {
+    spec.name: spec
+    for spec in (
+        ForecastSpec(
+            "severn_trent", "water_levels.SevernTrentReservoirLevel", "date", "percentage",
+            "water_levels.SevernTrentReservoirForecast", "predicted_percentage",
+            lstm_min_points=30, lstm_key="severn_trent",
+            accuracy_path="water_levels.SevernTrentForecastAccuracy",
+        ),
+        ForecastSpec(
+            "scottish_water_wide", "water_levels.ScottishWaterAverageLevel", "date", "current",
+            "water_levels.ScottishWaterForecast", "predicted_percentage",
+            lstm_min_points=30, lstm_key="scottish_water_wide",
+            accuracy_path="water_levels.ScottishWaterForecastAccuracy",
+        ),
+        ForecastSpec(
+            "scottish_water_regional", "water_levels.ScottishWaterRegionalLevel", "date", "current",
+            "water_levels.ScottishWaterRegionalForecast", "predicted_level",
+            group_field="area", forecast_group_field="area",
+            lstm_regular=True, lstm_key="scottish_water_regional",
+            accuracy_path="water_levels.ScottishWaterPredictionAccuracy",
+        ),
+        ForecastSpec(
+            "yorkshire", "water_levels.YorkshireReservoirData", "report_date", "reservoir_level",
+            "water_levels.YorkshireWaterPrediction", "predicted_reservoir_percent",
+            freq="MS", seasonal_period=12, monthly=True,
+            forecast_defaults={"predicted_demand_mld": 0.0}, lstm_key="yorkshire",
+            accuracy_path="water_levels.YorkshireWaterPredictionAccuracy",
+            accuracy_error_field="reservoir_error",
+        ),
+        ForecastSpec(
+            "southern_water", "water_levels.SouthernWaterReservoirLevel", "date", "current_level",
+            "water_levels.SouthernWaterReservoirForecast", "predicted_level",
+            group_field="reservoir", forecast_group_field="reservoir",
+            freq="W", resample=True, anchor_regular=True, steps=24, lstm_min_points=30,
+            lstm_key="southern_water",
+            accuracy_path="water_levels.SouthernWaterForecastAccuracy",
+        ),
+        ForecastSpec(
+            "environment_agency", "water_levels.EAwaterLevel", "date", "value",
+            "water_levels.EAwaterPrediction", "predicted_value",
+            group_field="station__region", forecast_group_field="region",
+            freq="W", interpolate=False, aggregate=True, anchor_regular=True, steps=16,
+            min_points=32, lstm_min_points=32, lstm_regular=True, round_to=None,
+            lstm_key="ea_region",
+            accuracy_path="water_levels.EAwaterPredictionAccuracy",
+        ),
+        ForecastSpec(
+            "environment_agency_stations", "water_levels.EAwaterLevel", "date", "value",
+            "water_levels.EAwaterStationPrediction", "predicted_value",
+            group_field="station_id", forecast_group_field="station_id",
+            freq="W", stacked=True, anchor_regular=True, steps=16, min_points=32,
+            lstm_min_points=32, lstm_regular=True, lstm_global=True, round_to=None,
+            history_days=5 * 365, order_search=False, lstm_key="ea_station",
+        ),
+    )
+}
+
+
+@dataclass
+class PreparedSeries:
+    """A series loaded once and shared by every model."""
+
+    raw: pd.DataFrame        # date/percentage rows as stored (averaged per date if aggregated)
+    regular: pd.Series       # on the spec's frequency, gaps interpolated
+
+    @property
+    def last_date(self):
+        return self.raw["date"].iloc[-1]
+
+    @property
+    def last_regular_date(self):
+        return self.regular.index[-1]
+
+
+def load_series(spec: ForecastSpec) -> dict:
+    """Read ``spec``'s level table in one query; return ``{series name: PreparedSeries}``."""
+    Model = apps.get_model(*spec.model_path.split("."))
+    fields = [spec.date_field, spec.value_field] + ([spec.group_field] if spec.group_field else [])
+    rows = Model.objects.all()
+    if spec.history_days:
+        rows = rows.filter(**{f"{spec.date_field}__gte": date.today() - timedelta(days=spec.history_days)})
+    df = pd.DataFrame.from_records(rows.values_list(*fields), columns=fields)
+    df = df.rename(columns={spec.date_field: "date", spec.value_field: "percentage"})
+    group = spec.group_field or "series"
+    if spec.group_field is None:
+        df[group] = spec.name
+    df["date"] = pd.to_datetime(df["date"])
+    if spec.stacked:
+        return _load_stacked(spec, df, group)
+
+    prepared = {}
+    for name, rows in df.groupby(group, sort=True):
+        rows = rows.sort_values("date", kind="stable")[["date", "percentage"]]
+        if spec.aggregate:
+            rows = rows.groupby("date", as_index=False)["percentage"].mean()
+        values = rows.set_index("date")["percentage"]
+        regular = values.resample(spec.freq).ffill() if spec.resample else values.asfreq(spec.freq)
+        if spec.interpolate:
+            regular = regular.interpolate()
+        prepared[name] = PreparedSeries(rows.reset_index(drop=True), regular)
+    return prepared
+
+
+def _load_stacked(spec: ForecastSpec, df: pd.DataFrame, group: str) -> dict:
+    """``load_series`` for many series: bin every row into a date x series matrix at once."""
+    if df.empty:
+        return {}
+    binned = (
+        df.groupby([pd.Grouper(key="date", freq=spec.freq), group])["percentage"].mean()
+        .unstack().asfreq(spec.freq)
+    )
+    regular = binned.interpolate(limit_area="inside") if spec.interpolate else binned
+    # Per-series frames are cut from the arrays directly; pandas reshaping per column dominates otherwise.
+    dates, values, filled = binned.index, binned.to_numpy(), regular.to_numpy()
+    prepared = {}
+    for j, name in enumerate(binned.columns):
+        observed = np.flatnonzero(~np.isnan(values[:, j]))
+        span = slice(observed[0], observed[-1] + 1)
+        raw = pd.DataFrame({"date": dates[observed], "percentage": values[observed, j]})
+        prepared[name] = PreparedSeries(raw, pd.Series(filled[span, j], index=dates[span], name=name))
+    return prepared
+
+
+def _target_dates(spec: ForecastSpec, last_date, steps: int):
+    last_date = pd.Timestamp(last_date).date()
+    if spec.monthly:
+        return [last_date + relativedelta(months=i + 1) for i in range(steps)]
+    return [last_date + timedelta(weeks=i + 1) for i in range(steps)]
+
+
+def _statistical_inputs(spec, prepared):
+    """Series with enough rows for ARIMA/REGRESSION, and the date each forecast starts from."""
+    series, anchors = {}, {}
+    for name, p in prepared.items():
+        if len(p.raw) < spec.min_points or p.regular.isnull().all():
+            continue
+        series[name] = p.regular
+        anchors[name] = p.last_regular_date if spec.anchor_regular else p.last_date
+    return series, anchors
+
+
+# The model runners import water_levels.ml.forecasting (statsmodels, and the
+# LSTM's TensorFlow behind it) on first use, so importing the engine is cheap.
+
+def _run_arima(spec, prepared, deadline=None):
+    from water_levels.ml.arima_state import get_arima_state
+    from water_levels.ml.forecasting import forecast_arima_many
+    from water_levels.ml.order_search import select_orders
+
+    series, anchors = _statistical_inputs(spec, prepared)
+    series = {name: s for name, s in series.items() if s.nunique() > 1}
+    orders = None
+    if settings.ARIMA_ORDER_SEARCH and spec.order_search:
+        orders = select_orders(
+            series, spec.seasonal_period, key=spec.name, label=f"{spec.name} order search"
+        )
+    names, chunk = list(series), max(len(series), 1)
+    if deadline is not None:
+        # Series fitted longest ago go first, so runs cut short still reach every series in turn.
+        store = get_arima_state()
+        names.sort(key=lambda name: store.get(f"{spec.name}/{name}").get("updated_at", 0))
+        chunk = ARIMA_BUDGET_CHUNK
+
+    forecasts, errors = {}, {}
+    for start in range(0, len(names), chunk):
+        if deadline is not None and time.monotonic() > deadline:
+            print(f"[forecast] {spec.name} ARIMA: time budget reached, "
+                  f"{len(names) - start} series left for the next run")
+            break
+        # Stacked specs hold more series than the fit cache; their ARIMA state already
+        # makes unchanged weeks cheap, so they skip it rather than evict every other fit.
+        done, failed = forecast_arima_many(
+            {name: series[name] for name in names[start:start + chunk]}, steps=spec.steps,
+            label=f"{spec.name} arima", key=spec.name, orders=orders, use_cache=not spec.stacked,
+        )
+        forecasts.update(done)
+        errors.update(failed)
+    for name, e in errors.items():
+        print(f"ARIMA fit error for {spec.name}/{name}: {e}")
+    return {name: (anchors[name], preds) for name, preds in forecasts.items()}
+
+
+def _run_regression(spec, prepared, deadline=None):
+    from water_levels.ml.forecasting import forecast_regression_many
+
+    series, anchors = _statistical_inputs(spec, prepared)
+    series = {name: s.dropna() for name, s in series.items()}
+    forecasts = forecast_regression_many(series, steps=spec.steps, period=spec.seasonal_period)
+    return {name: (anchors[name], preds) for name, preds in forecasts.items()}
+
+
+def _run_lstm(spec, prepared, deadline=None):
+    from water_levels.ml.forecasting import forecast_global_lstm, forecast_lstm
+
+    frames, anchors = {}, {}
+    for name, p in prepared.items():
+        if len(p.raw) < spec.lstm_min_points:
+            continue
+        if spec.lstm_regular:
+            frames[name] = p.regular.dropna().rename("percentage").rename_axis("date").reset_index()
+            anchors[name] = p.last_regular_date
+        else:
+            frames[name] = p.raw.dropna()
+            anchors[name] = p.last_date
+
+    if spec.group_field is None:
+        preds = {
+            name: forecast_lstm(frame, steps=spec.steps, key=spec.lstm_key)
+            for name, frame in frames.items()
+        }
+    elif settings.LSTM_GLOBAL_MODELS or spec.lstm_global:
+        preds = forecast_global_lstm(
+            frames, steps=spec.steps, key=f"{spec.lstm_key}/global", deadline=deadline
+        )
+    else:
+        preds = {
+            name: forecast_lstm(frame, steps=spec.steps, key=f"{spec.lstm_key}/{name}")
+            for name, frame in frames.items()
+        }
+    return {name: (anchors[name], p) for name, p in preds.items()}
+
+
+def _stored_frame(spec, path, fields, **filters) -> pd.DataFrame:
+    """``series`` plus ``fields`` from one query on ``path``, grouped like the forecasts."""
+    Model = apps.get_model(*path.split("."))
+    group = spec.forecast_group_field
+    columns = ([group] if group else []) + list(fields)
+    df = pd.DataFrame(list(Model.objects.filter(**filters).values(*columns)), columns=columns)
+    if group:
+        return df.rename(columns={group: "series"})
+    return df.assign(series=spec.name)
+
+
+def _run_ensemble(spec, prepared):
+    """Accuracy-weighted mean of the stored forecasts dated after each series' last reading."""
+    from water_levels.ml.ensemble import combine, model_weights
+
+    last = pd.Series({name: p.last_date for name, p in prepared.items()}, dtype="datetime64[ns]")
+    forecasts = _stored_frame(
+        spec, spec.forecast_path, ["date", "model_type", spec.forecast_field],
+        model_type__in=BASE_MODEL_TYPES, date__gt=last.min().date(),
+    ).rename(columns={spec.forecast_field: "value"})
+    forecasts["date"] = pd.to_datetime(forecasts["date"])
+    forecasts = forecasts[forecasts["date"] > forecasts["series"].map(last)]
+
+    errors = pd.DataFrame(columns=["series", "date", "model_type", "error"])
+    if spec.accuracy_path:
+        errors = _stored_frame(
+            spec, spec.accuracy_path, ["date", "model_type", spec.accuracy_error_field],
+            model_type__in=BASE_MODEL_TYPES,
+        ).rename(columns={spec.accuracy_error_field: "error"})
+    combined = combine(forecasts, model_weights(errors, settings.ENSEMBLE_ERROR_WINDOW))
+    return {
+        name: (list(rows["date"].dt.date), rows["value"].to_numpy())
+        for name, rows in combined.groupby("series", sort=True)
+    }
+
+
+RUNNERS = {"ARIMA": _run_arima, "LSTM": _run_lstm, "REGRESSION": _run_regression}
+
+
+def write_forecasts(spec: ForecastSpec, results: dict) -> int:
+    """Store ``{model_type: {series: (last_date, preds)}}`` for ``spec``; returns rows written."""
+    return write_dated_forecasts(spec, {
+        model_type: {
+            name: (_target_dates(spec, last_date, len(preds)), preds)
+            for name, (last_date, preds) in by_series.items()
+        }
+        for model_type, by_series in results.items()
+    })
+
+
+def write_dated_forecasts(spec: ForecastSpec, results: dict) -> int:
+    """Store ``{model_type: {series: (target dates, preds)}}`` for ``spec``; returns rows written."""
+    Forecast = apps.get_model(*spec.forecast_path.split("."))
+    written = 0
+    with transaction.atomic():
+        for model_type, by_series in results.items():
+            rows = []
+            for name, (dates, preds) in by_series.items():
+                lookup = {spec.forecast_group_field: name} if spec.forecast_group_field else {}
+                for target, value in zip(dates, preds):
+                    value = float(value) if spec.round_to is None else round(float(value), spec.round_to)
+                    rows.append({
+                        **lookup,
+                        "date": target,
+                        "model_type": model_type,
+                        spec.forecast_field: value,
+                        **spec.forecast_defaults,
+                    })
+            written += upsert_forecasts(Forecast, rows)
+    return written
+
+
+def _report_stage(name: str, stage: str, count: int, seconds: float, unit: str = "series"):
+    rate = f"{count / seconds:,.0f}" if seconds > 0 else "-"
+    print(f"[forecast] {name} {stage}: {count} {unit} in {seconds:.1f}s ({rate} {unit}/s)")
+
+
+def run_forecasts(name: str, models=MODEL_TYPES, budget: Optional[float] = None) -> dict:
+    """Forecast every series of provider ``name`` with ``models``; returns rows written per model.
+
+    A model that raises is logged and left out; the others are still written.
+    With ``budget`` (seconds) the fitted models (``RUNNERS``) run in the order
+    given, each with an even share of the time left: ARIMA stops between chunks
+    and LSTM training between epochs when their share runs out. Writing and
+    ENSEMBLE only post-process those fits, take no share and always run, so
+    whatever was fitted gets stored.
+    """
+    spec = SPECS[name]
+    started = time.monotonic()
+    deadline = started + budget if budget else None
+    prepared = load_series(spec)
+    if not prepared:
+        print(f"[forecast] {name}: no data")
+        return {}
+    _report_stage(name, "load", len(prepared), time.monotonic() - started)
+
+    results = {}
+    # Only fitting stages split the budget; ENSEMBLE is handled after the loop.
+    pending = [model_type for model_type in models if model_type in RUNNERS]
+    for i, model_type in enumerate(pending):
+        t0 = time.monotonic()
+        stage_deadline = None
+        if deadline is not None:
+            if t0 > deadline:
+                print(f"[forecast] {name}: time budget reached, {model_type} skipped")
+                continue
+            # An even share of what is left, so no model starves the ones after it;
+            # time a model does not use passes on to the next.
+            stage_deadline = t0 + (deadline - t0) / (len(pending) - i)
+        try:
+            results[model_type] = RUNNERS[model_type](spec, prepared, deadline=stage_deadline)
+        except Exception as e:
+            # One model failing must not discard the others' forecasts.
+            print(f"[forecast] {name} {model_type} failed: {type(e).__name__}: {e}")
+            continue
+        _report_stage(name, model_type, len(results[model_type]), time.monotonic() - t0)
+    if results:
+        t0 = time.monotonic()
+        written = write_forecasts(spec, results)
+        _report_stage(name, "write", written, time.monotonic() - t0, unit="rows")
+    if "ENSEMBLE" in models:
+        # Combines what was just written with any stored forecasts for models not run now.
+        t0 = time.monotonic()
+        try:
+            ensemble = _run_ensemble(spec, prepared)
+        except Exception as e:
+            print(f"[forecast] {name} ENSEMBLE failed: {type(e).__name__}: {e}")
+        else:
+            results["ENSEMBLE"] = ensemble
+            write_dated_forecasts(spec, {"ENSEMBLE": ensemble})
+            _report_stage(name, "ENSEMBLE", len(ensemble), time.monotonic() - t0)
+    counts = {model_type: sum(len(p) for _, p in r.values()) for model_type, r in results.items()}
+    print(f"[forecast] {name}: {len(prepared)} series in {time.monotonic() - started:.1f}s, "
+          f"rows written {counts}")
+    return counts
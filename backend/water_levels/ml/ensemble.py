@@ -0,0 +1,53 @@
+"""Accuracy-weighted combination of stored ARIMA, LSTM and REGRESSION forecasts.
+
+Nothing is fitted. A model's weight for a series is the inverse of its mean
+absolute percentage error over that series' latest ``window`` scored
+forecasts, as recorded in the provider's accuracy table. The weights for
+every series come out of one groupby. The combination is a single masked
+weighted average over a ``(series, date) x model`` matrix, so a date that only
+some models forecast is averaged over those models alone.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Floor on a model's mean error (in %) so one lucky near-perfect week cannot
+# take all the weight.
+MIN_ERROR = 0.1
+
+
+def model_weights(errors: pd.DataFrame, window: int) -> pd.DataFrame:
+    """``series x model_type`` weights from ``series/model_type/date/error`` rows.
+
+    A model with no scored forecasts for a series takes its mean error over
+    the other series. Series with no scores at all are left out, and
+    ``combine`` gives them equal weights.
+    """
+    e = errors.dropna(subset=["error"]).sort_values("date", kind="stable")
+    if e.empty:
+        return pd.DataFrame(dtype=float)
+    recent = e.groupby(["series", "model_type"]).tail(window)
+    mape = recent.groupby(["series", "model_type"])["error"].mean().abs().unstack()
+    mape = mape.fillna(mape.mean())
+    return 1.0 / mape.clip(lower=MIN_ERROR)
+
+
+def combine(forecasts: pd.DataFrame, weights: pd.DataFrame) -> pd.DataFrame:
+    """Weighted mean per ``series/date`` of ``series/date/model_type/value`` rows."""
+    if forecasts.empty:
+        return pd.DataFrame(columns=["series", "date", "value"])
+    wide = forecasts.pivot_table(
+        index=["series", "date"], columns="model_type", values="value", aggfunc="last"
+    )
+    values = wide.to_numpy(dtype=float)
+    w = weights.reindex(
+        index=wide.index.get_level_values("series"), columns=wide.columns
+    ).to_numpy(dtype=float)
+    # A model unscored everywhere gets the row's mean weight; an unscored series equal weights.
+    scored = ~np.isnan(w)
+    n_scored = scored.sum(axis=1, keepdims=True)
+    row_mean = np.where(scored, w, 0.0).sum(axis=1, keepdims=True) / np.maximum(n_scored, 1)
+    w = np.where(scored, w, np.where(n_scored > 0, row_mean, 1.0))
+    w = np.where(np.isnan(values), 0.0, w)
+    combined = (w * np.nan_to_num(values)).sum(axis=1) / w.sum(axis=1)
+    return wide.index.to_frame(index=False).assign(value=combined)
@@ -0,0 +1,150 @@
+"""File-backed cache of model forecasts keyed by what went into the fit.
+
+A fingerprint hashes the input series (values and index), the model type and
+its hyperparameters. When a weekly task sees the same fingerprint again the
+stored forecast is returned and the fit is skipped. Entries live as small JSON
+files under ``settings.ML_ARTIFACT_DIR/fit_cache`` and are evicted by age,
+entry count and total size, least recently used first.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+# Bump when a model's fitting code changes so old forecasts are not reused.
+CACHE_VERSION = 1
+
+
+def series_fingerprint(data, model_type: str, params: dict = None) -> str:
+    """Return a stable sha256 over ``data`` (Series/DataFrame/array), model and params."""
+    digest = hashlib.sha256()
+    digest.update(f"v{CACHE_VERSION}|{model_type}|".encode())
+    digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        if isinstance(data, pd.DataFrame):
+            digest.update("|".join(map(str, data.columns)).encode())
+    else:
+        digest.update(np.ascontiguousarray(np.asarray(data, dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+class FitCache:
+    """Forecast store with hit/miss/eviction counters for the current process."""
+
+    def __init__(self, directory=None, max_entries=None, max_age_days=None, max_mb=None):
+        self.directory = Path(directory or Path(settings.ML_ARTIFACT_DIR) / "fit_cache")
+        self.max_entries = max_entries if max_entries is not None else settings.ML_FIT_CACHE_MAX_ENTRIES
+        max_age_days = max_age_days if max_age_days is not None else settings.ML_FIT_CACHE_MAX_AGE_DAYS
+        max_mb = max_mb if max_mb is not None else settings.ML_FIT_CACHE_MAX_MB
+        self.max_age = max_age_days * 86400
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                raise FileNotFoundError
+            forecast = np.asarray(json.loads(path.read_text())["forecast"], dtype=float)
+        except (FileNotFoundError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        os.utime(path)
+        with self._lock:
+            self.hits += 1
+        return forecast
+
+    def put(self, key, forecast, model_type="", params=None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps(
+                {
+                    "model_type": model_type,
+                    "params": params or {},
+                    "forecast": np.asarray(forecast, dtype=float).ravel().tolist(),
+                },
+                default=str,
+            )
+        )
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then the least recently used until within bounds."""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                self._remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            total -= size
+            self._remove(path)
+
+    def _remove(self, path):
+        path.unlink(missing_ok=True)
+        with self._lock:
+            self.evictions += 1
+
+    def get_or_fit(self, data, model_type, params, fit):
+        """Return the cached forecast for this input, or call ``fit()`` and store it."""
+        if not settings.ML_FIT_CACHE_ENABLED:
+            return np.asarray(fit(), dtype=float)
+        key = series_fingerprint(data, model_type, params)
+        forecast = self.get(key)
+        if forecast is None:
+            forecast = np.asarray(fit(), dtype=float)
+            self.put(key, forecast, model_type, params)
+        return forecast
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def report(self, label="fit cache"):
+        s = self.stats()
+        print(
+            f"{label}: {s['hits']} hits, {s['misses']} misses "
+            f"({s['hit_rate']:.0%} hit rate), {s['evictions']} evicted"
+        )
+
+
+_default_cache = None
+
+
+def get_fit_cache() -> FitCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = FitCache()
+    return _default_cache
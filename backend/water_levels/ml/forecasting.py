@@ -0,0 +1,298 @@
+"""Model fitting entry points shared by the provider forecast modules.
+
+Each helper returns the next ``steps`` values as a NumPy array. ARIMA and LSTM
+fits go through the fit cache, so a series that has not changed since the last
+run is not refitted. Regression is closed-form and solved in one batched call,
+which is cheaper than a cache lookup.
+
+Named ARIMA series keep state between runs (see ``arima_state``). When new
+rows have only been appended since the last fit, the stored parameters are
+extended over them by Kalman filtering, with no re-estimation. A full fit,
+warm-started from those parameters, happens on a schedule, when history is
+revised, or when the new rows' one-step errors show the model has drifted.
+"""
+
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import scipy._lib._util
+
+if not hasattr(scipy._lib._util, "_lazywhere"):
+    def _lazywhere(cond, arrays, f, fillvalue=np.nan):
+        arrays = [np.asarray(a) for a in arrays]
+        cond = np.asarray(cond)
+        out = np.full(cond.shape, fillvalue, dtype=np.result_type(*arrays))
+        if np.any(cond):
+            out[cond] = f(*[a[cond] for a in arrays])
+        return out
+
+    scipy._lib._util._lazywhere = _lazywhere
+
+from statsmodels.tsa.arima.model import ARIMA
+
+from django.conf import settings
+
+from water_levels.ml.arima_state import get_arima_state
+from water_levels.ml.fit_cache import get_fit_cache, series_fingerprint
+from water_levels.ml.harmonic_regression import harmonic_forecast
+from water_levels.ml.parallel import fit_many
+
+
+def _endog(series) -> np.ndarray:
+    """The series' values alone: with a date index statsmodels rebuilds the weekly
+    index on every filter and forecast, which costs more than the filter itself."""
+    return np.asarray(series, dtype=float)
+
+
+NO_SEASON = (0, 0, 0, 0)
+
+
+def _fit_arima(series: pd.Series, steps: int, order, start_params=None,
+               seasonal_order=NO_SEASON) -> dict:
+    """Fit ``ARIMA(order, seasonal_order)``, from ``start_params`` when given, and forecast ``steps``.
+
+    A warm start that raises or fails to converge is retried from the default
+    start. Returns the forecast, the fitted parameters and the optimiser's
+    iteration count, plus whether the warm start was used (``warm``) or fell
+    back to a cold start (``fallback``).
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        warnings.filterwarnings("ignore", message=".*converge")
+        model = ARIMA(_endog(series), order=order, seasonal_order=seasonal_order)
+        result = None
+        tried = start_params is not None and len(start_params) == len(model.param_names)
+        if tried:
+            try:
+                result = model.fit(start_params=np.asarray(start_params, dtype=float))
+            except Exception:
+                result = None
+            if result is not None and not (result.mle_retvals or {}).get("converged", True):
+                result = None
+        warm = result is not None
+        if result is None:
+            result = model.fit()
+    return {
+        "forecast": np.asarray(result.forecast(steps=steps), dtype=float),
+        "params": np.asarray(result.params, dtype=float).tolist(),
+        "iterations": (result.mle_retvals or {}).get("iterations"),
+        "warm": warm,
+        "fallback": tried and not warm,
+    }
+
+
+def _update_arima(series: pd.Series, steps: int, order, state: dict, drift_factor: float,
+                  seasonal_order=NO_SEASON) -> dict:
+    """Extend ``state``'s fit over the rows after ``state["nobs"]`` without re-estimating.
+
+    The stored parameters are run through the Kalman filter on the whole
+    series, which is what ``ARIMAResults.append(refit=False)`` does. The new
+    rows' squared standardised one-step errors are added to the running
+    totals since the last full fit. When their mean exceeds ``drift_factor``
+    (it is about 1 for a well-specified model), ``{"reason": ...}`` is
+    returned instead so the caller refits.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", category=UserWarning)
+        model = ARIMA(_endog(series), order=order, seasonal_order=seasonal_order)
+        result = model.filter(np.asarray(state["params"], dtype=float))
+    errors = result.standardized_forecasts_error[0, state["nobs"]:]
+    drift_sum = state.get("drift_sum", 0.0) + float(np.nansum(errors ** 2))
+    drift_n = state.get("drift_n", 0) + int(np.isfinite(errors).sum())
+    if drift_n and drift_sum / drift_n > drift_factor:
+        return {"reason": "residuals degraded"}
+    return {
+        "forecast": np.asarray(result.forecast(steps=steps), dtype=float),
+        "params": state["params"],
+        "iterations": None,
+        "warm": False,
+        "fallback": False,
+        "updated": True,
+        "drift_sum": drift_sum,
+        "drift_n": drift_n,
+    }
+
+
+def _arima_job(series: pd.Series, steps: int, order, start_params=None, state=None,
+               drift_factor: float = 3.0, seasonal_order=NO_SEASON) -> dict:
+    """Update from ``state`` by filtering when given and still healthy, else fit."""
+    reason = None
+    if state is not None:
+        update = _update_arima(series, steps, order, state, drift_factor, seasonal_order)
+        if "reason" not in update:
+            return update
+        reason = update["reason"]
+    fit = _fit_arima(series, steps, order, start_params, seasonal_order)
+    return {**fit, "updated": False, "reason": reason}
+
+
+def _same_order(state: dict, order, seasonal_order) -> bool:
+    return (
+        state.get("order") == list(order)
+        and state.get("seasonal_order", list(NO_SEASON)) == list(seasonal_order)
+    )
+
+
+def _update_blocker(state: dict, series: pd.Series, order, seasonal_order, now: float):
+    """Why ``state`` cannot be extended over ``series`` by filtering, or None if it can."""
+    if not settings.ARIMA_INCREMENTAL_UPDATE:
+        return "incremental updates disabled"
+    if not state.get("params") or "data_hash" not in state:
+        return "no saved fit"
+    if not _same_order(state, order, seasonal_order):
+        return "order changed"
+    if now - state.get("fitted_at", 0) > settings.ARIMA_FULL_REFIT_DAYS * 86400:
+        return "scheduled refit"
+    nobs = state["nobs"]
+    if len(series) < nobs or series_fingerprint(series.iloc[:nobs], "ARIMA_DATA") != state["data_hash"]:
+        return "history revised"
+    return None
+
+
+def _report_iterations(label: str, fits: dict, reasons: dict):
+    """Print updates, refit reasons and optimiser iterations for warm and cold fits."""
+    groups = {"warm": [], "cold": []}
+    for fit in fits.values():
+        if fit["iterations"] is not None:
+            groups["warm" if fit["warm"] else "cold"].append(fit["iterations"])
+    parts = [
+        f"{kind} {len(its)} fit(s) avg {np.mean(its):.1f}"
+        for kind, its in groups.items() if its
+    ]
+    fallbacks = sum(fit["fallback"] for fit in fits.values())
+    updated = sum(fit.get("updated", False) for fit in fits.values())
+    if updated or reasons:
+        counts = pd.Series(list(reasons.values()), dtype=object).value_counts()
+        why = ", ".join(f"{reason}: {n}" for reason, n in counts.items())
+        print(f"[{label}] {updated} updated by filtering, {len(reasons)} refitted ({why or '-'})")
+    if parts:
+        print(f"[{label}] optimiser iterations: {', '.join(parts)}; {fallbacks} warm start(s) fell back")
+
+
+def forecast_arima(series: pd.Series, steps: int, order=(2, 1, 2)) -> np.ndarray:
+    """Fit ``ARIMA(order)`` to ``series`` and forecast ``steps`` periods ahead."""
+    return get_fit_cache().get_or_fit(
+        series, "ARIMA", {"order": list(order), "steps": steps},
+        lambda: _fit_arima(series, steps, order)["forecast"],
+    )
+
+
+def forecast_arima_many(series: dict, steps: int, order=(2, 1, 2), label: str = "arima",
+                        key: str = None, orders: dict = None, use_cache: bool = True):
+    """``forecast_arima`` for every ``{name: series}``, fitting cache misses in parallel.
+
+    ``orders`` gives ``{name: (order, seasonal_order)}`` for series that do not
+    use the shared non-seasonal ``order`` (see ``order_search``). With ``key``
+    each series' fitted state is stored as ``"{key}/{name}"``. The next run
+    extends it over new rows by filtering
+    (``ARIMA_INCREMENTAL_UPDATE``) or warm-starts a refit from its parameters
+    (``ARIMA_WARM_START``). Cache lookups, state reads and writes stay in this
+    process; only the filtering and fits go to the ``ML_FIT_WORKERS`` pool.
+    ``use_cache=False`` bypasses the fit cache, for callers with more series
+    than it holds. Returns ``(forecasts, errors)`` keyed by name.
+    """
+    cache = get_fit_cache()
+    store = get_arima_state() if key else None
+    spec = {name: (orders or {}).get(name, (tuple(order), NO_SEASON)) for name in series}
+    params = {
+        name: {"order": list(o), "seasonal_order": list(so), "steps": steps}
+        for name, (o, so) in spec.items()
+    }
+    forecasts, keys = {}, {}
+    for name, s in series.items():
+        if use_cache and settings.ML_FIT_CACHE_ENABLED:
+            keys[name] = series_fingerprint(s, "ARIMA", params[name])
+            cached = cache.get(keys[name])
+            if cached is not None:
+                forecasts[name] = cached
+    now = time.time()
+    misses, reasons = {}, {}
+    for name, s in series.items():
+        if name in forecasts:
+            continue
+        o, so = spec[name]
+        start = state = None
+        if store is not None:
+            saved = store.get(f"{key}/{name}")
+            if settings.ARIMA_WARM_START and _same_order(saved, o, so):
+                start = saved.get("params")
+            reasons[name] = _update_blocker(saved, s, o, so, now)
+            if reasons[name] is None:
+                state = saved
+        misses[name] = (s, steps, tuple(o), start, state, settings.ARIMA_DRIFT_FACTOR, tuple(so))
+    fitted, errors = fit_many(_arima_job, misses, label=label)
+    for name, fit in fitted.items():
+        forecasts[name] = fit["forecast"]
+        if name in keys:
+            cache.put(keys[name], fit["forecast"], "ARIMA", params[name])
+        if store is None:
+            continue
+        data_hash = series_fingerprint(series[name], "ARIMA_DATA")
+        if fit["updated"]:
+            reasons.pop(name, None)
+            store.put(f"{key}/{name}", nobs=len(series[name]), data_hash=data_hash,
+                      drift_sum=fit["drift_sum"], drift_n=fit["drift_n"])
+        else:
+            reasons[name] = fit["reason"] or reasons.get(name)
+            store.put(f"{key}/{name}", order=list(spec[name][0]),
+                      seasonal_order=list(spec[name][1]), params=fit["params"],
+                      nobs=len(series[name]), data_hash=data_hash, iterations=fit["iterations"],
+                      fitted_at=now, drift_sum=0.0, drift_n=0)
+    reasons = {name: why for name, why in reasons.items() if name in fitted}
+    _report_iterations(label, fitted, reasons)
+    return {name: forecasts[name] for name in series if name in forecasts}, errors
+
+
+def forecast_regression(values, steps: int, period: int = 52) -> np.ndarray:
+    """Trend plus one annual harmonic fitted by least squares over positions ``0..n-1``."""
+    return harmonic_forecast([values], steps, period)[0]
+
+
+def forecast_regression_many(series: dict, steps: int, period: int = 52) -> dict:
+    """``forecast_regression`` for every ``{name: values}`` entry, solved together."""
+    names = list(series)
+    if not names:
+        return {}
+    preds = harmonic_forecast([series[name] for name in names], steps, period)
+    return dict(zip(names, preds))
+
+
+def forecast_lstm(df: pd.DataFrame, steps: int = 4, key: str = None) -> np.ndarray:
+    """Train the shared LSTM on ``df`` (``date``/``percentage`` columns) and forecast.
+
+    ``key`` names the series so its model is persisted and warm-started.
+    """
+    from water_levels.ml.general_lstm.lstm import train_lstm
+
+    return get_fit_cache().get_or_fit(
+        df[["date", "percentage"]].reset_index(drop=True),
+        "LSTM",
+        {"steps": steps},
+        lambda: train_lstm(df, steps=steps, key=key),
+    )
+
+
+def forecast_global_lstm(frames: dict, steps: int = 4, key: str = None, deadline: float = None) -> dict:
+    """Forecast every ``date``/``percentage`` frame in ``frames`` with one shared LSTM.
+
+    Returns ``{name: forecast}``; series too short to window are omitted.
+    Training stops between epochs once ``deadline`` (``time.monotonic()``) passes.
+    """
+    from water_levels.ml.general_lstm.lstm import train_global_lstm
+
+    names = sorted(frames)
+    pooled = pd.concat(
+        [frames[name][["date", "percentage"]].assign(series=name) for name in names],
+        ignore_index=True,
+    )
+
+    def fit():
+        preds = train_global_lstm({name: frames[name] for name in names}, steps=steps, key=key,
+                                  deadline=deadline)
+        return np.array([preds.get(name, np.full(steps, np.nan)) for name in names])
+
+    flat = get_fit_cache().get_or_fit(pooled, "GLOBAL_LSTM", {"steps": steps}, fit)
+    rows = np.asarray(flat, dtype=float).reshape(len(names), steps)
+    return {name: row for name, row in zip(names, rows) if not np.isnan(row).any()}
@@ -1,35 +1,319 @@
+import json
+import re
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
+from django.conf import settings
 from sklearn.preprocessing import MinMaxScaler
-from keras.models import Sequential
-from keras.layers import Input, LSTM, Dense
 
-def train_lstm(df, steps: int = 4):
-    """Train an LSTM model and predict future values."""
+from water_levels.ml.general_lstm.numpy_lstm import NumpyLSTM, export_weights
 
-    df = df.set_index("date")
-    scaler = MinMaxScaler()
-    scaled = scaler.fit_transform(df[["percentage"]])
+# TensorFlow/Keras are imported inside the functions that train or load a Keras
+# model, so forecasting from an up-to-date saved model never loads them.
+
+WINDOW = 10
+FULL_EPOCHS = 50
+# New data scaled outside this band means the stored scaler no longer fits.
+SCALE_MARGIN = 0.1
+# Fewest pooled training windows a direct multi-horizon model is trained on;
+# shorter histories fall back to the one-step recursive model.
+MIN_DIRECT_WINDOWS = 20
+ARTIFACT_VERSION = 3
 
-    X, y = [], []
-    for i in range(10, len(scaled)):
-        X.append(scaled[i-10:i])
-        y.append(scaled[i])
-    X, y = np.array(X), np.array(y)
+
+def build_model(window: int = WINDOW, horizon: int = 1):
+    """One-step model, or a direct model emitting ``horizon`` steps at once."""
+    from keras.layers import Dense, Input, LSTM
+    from keras.models import Sequential
 
     model = Sequential()
-    model.add(Input(shape=(X.shape[1], 1)))
+    model.add(Input(shape=(window, 1)))
     model.add(LSTM(50, activation='relu'))
-    model.add(Dense(1))
+    model.add(Dense(horizon))
     model.compile(optimizer='adam', loss='mse')
-    model.fit(X, y, epochs=50, verbose=0)
+    return model
+
+
+def make_windows(scaled, window: int = WINDOW, start: int = None, horizon: int = 1):
+    """Sliding ``window``-length inputs and the next ``horizon`` targets.
+
+    Only windows whose first target index is at least ``start`` are returned.
+    """
+    X, y = [], []
+    for i in range(max(window, start or window), len(scaled) - horizon + 1):
+        X.append(scaled[i-window:i])
+        y.append(scaled[i:i+horizon, 0])
+    return np.array(X).reshape(-1, window, 1), np.array(y).reshape(-1, horizon)
+
+
+def _pooled_windows(scaled, starts=None, horizon: int = 1):
+    """Stack the windows of every series in ``scaled`` into one training set."""
+    parts = [
+        make_windows(values, start=(starts or {}).get(name), horizon=horizon)
+        for name, values in scaled.items()
+    ]
+    return np.concatenate([X for X, _ in parts]), np.concatenate([y for _, y in parts])
+
+
+def choose_horizon(lengths, steps: int) -> int:
+    """Model output width for ``steps`` ahead: all of them in ``direct`` mode if the data allows."""
+    if settings.LSTM_FORECAST_MODE != "direct" or steps == 1:
+        return 1
+    windows = sum(max(0, n - WINDOW - steps + 1) for n in lengths)
+    return steps if windows >= MIN_DIRECT_WINDOWS else 1
+
+
+def _scaler(lo, hi):
+    return MinMaxScaler().fit([[lo], [hi]])
+
+
+class LSTMArtifact:
+    """Saved weights, per-series scaler bounds and training metadata for one model.
+
+    Alongside the Keras model a ``weights.npz`` export is kept for the NumPy
+    inference runtime.
+    """
+
+    def __init__(self, key: str):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", key)
+        self.directory = Path(settings.ML_ARTIFACT_DIR) / "lstm" / slug
+        self.model_path = self.directory / "model.keras"
+        self.weights_path = self.directory / "weights.npz"
+        self.meta_path = self.directory / "meta.json"
+
+    def exists(self):
+        return self.model_path.exists() and self.meta_path.exists()
+
+    def load_meta(self):
+        return json.loads(self.meta_path.read_text())
+
+    def scalers(self, meta):
+        return {name: _scaler(lo, hi) for name, (lo, hi) in meta.get("scalers", {}).items()}
+
+    def load_model(self):
+        from keras.models import load_model
+
+        return load_model(self.model_path)
+
+    def load_runtime(self):
+        """The NumPy runtime if exported, else the Keras model."""
+        if self.weights_path.exists():
+            return NumpyLSTM.load(self.weights_path)
+        return self.load_model()
+
+    def save(self, model, scalers, meta):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        model.save(self.model_path)
+        export_weights(model, self.weights_path)
+        meta = {
+            **meta,
+            "version": ARTIFACT_VERSION,
+            "scalers": {
+                str(name): [float(s.data_min_[0]), float(s.data_max_[0])] for name, s in scalers.items()
+            },
+        }
+        self.meta_path.write_text(json.dumps(meta, indent=1))
+
+
+def _stop_at(deadline, key):
+    """Keras callback ending training after the epoch in which ``deadline`` (monotonic) passes."""
+    from keras.callbacks import Callback
+
+    class StopAtDeadline(Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            if time.monotonic() > deadline:
+                print(f"LSTM {key}: time budget reached, training stopped after {epoch + 1} epoch(s)")
+                self.model.stop_training = True
+
+    return StopAtDeadline()
 
+
+def _cap_windows(X, y, limit: int):
+    """At most ``limit`` training windows, drawn evenly at random across all series."""
+    if len(X) <= limit:
+        return X, y
+    keep = np.sort(np.random.default_rng(0).choice(len(X), limit, replace=False))
+    return X[keep], y[keep]
+
+
+def _full_retrain_due(meta, now):
+    trained = datetime.fromisoformat(meta["full_trained_at"])
+    return now - trained >= timedelta(days=settings.LSTM_FULL_RETRAIN_DAYS)
+
+
+def _out_of_range(values):
+    return len(values) > 0 and (values.min() < -SCALE_MARGIN or values.max() > 1 + SCALE_MARGIN)
+
+
+def _fit_model(series, key, now, horizon: int = 1, deadline: float = None):
+    """Fit one LSTM over every series in ``series`` (name -> pd.Series).
+
+    Returns ``(model, scalers, scaled)`` keyed by series name; each series keeps
+    its own MinMaxScaler and the windows of all series are pooled for training.
+    With a ``key`` the model warm-starts from its saved artifact: it is
+    fine-tuned for ``LSTM_FINE_TUNE_EPOCHS`` on windows ending at rows newer than
+    the last run, or reused as is if there are none. A full 50-epoch retrain
+    happens when there is no artifact, a series is new, the scheduled retrain is
+    due, new values fall outside a stored scaler's range, or the saved model's
+    error on the new windows has drifted past ``LSTM_DRIFT_FACTOR`` times its
+    loss at the last full training. ``horizon`` is the model's output width;
+    a saved model of another width is retrained. Full training uses at most
+    ``LSTM_MAX_TRAIN_WINDOWS`` pooled windows, and any training stops after the
+    epoch in which ``deadline`` (``time.monotonic()``) passes.
+    """
+    artifact = LSTMArtifact(key) if key else None
+    callbacks = [_stop_at(deadline, key)] if deadline is not None else []
+    # Metadata is JSON, so series names (station ids may be ints) are stored as strings.
+    last_dates = {str(name): s.index[-1].isoformat() for name, s in series.items()}
+    reason = "no saved model"
+
+    if artifact is not None and artifact.exists():
+        meta = artifact.load_meta()
+        stored = artifact.scalers(meta)
+        saved_scalers = {name: stored[str(name)] for name in series if str(name) in stored}
+        new = [name for name in series if name not in saved_scalers]
+        if meta.get("version") != ARTIFACT_VERSION:
+            reason = "artifact format changed"
+        elif meta.get("horizon", 1) != horizon:
+            reason = f"horizon changed to {horizon}"
+        elif new:
+            reason = f"{len(new)} new series" if len(new) > 10 else f"new series {sorted(new)}"
+        elif _full_retrain_due(meta, now):
+            reason = "scheduled retrain"
+        else:
+            scalers = saved_scalers
+            scaled = {
+                name: scalers[name].transform(s.to_numpy().reshape(-1, 1)) for name, s in series.items()
+            }
+            first_new = {
+                name: len(s) - int((s.index > pd.Timestamp(meta["last_dates"][str(name)])).sum())
+                for name, s in series.items()
+            }
+            starts = {name: i - horizon + 1 for name, i in first_new.items()}
+            X_new, y_new = _pooled_windows(scaled, starts, horizon)
+
+            if any(_out_of_range(scaled[name][first_new[name]:]) for name in series):
+                reason = "new values outside scaler range"
+            elif not len(X_new):
+                print(f"LSTM {key}: no new rows, reusing saved model")
+                return artifact.load_runtime(), scalers, scaled
+            else:
+                model = artifact.load_model()
+                loss = float(model.evaluate(X_new, y_new, verbose=0))
+                if loss > settings.LSTM_DRIFT_FACTOR * meta["baseline_loss"]:
+                    reason = f"drift (loss {loss:.4f} vs baseline {meta['baseline_loss']:.4f})"
+                else:
+                    model.fit(X_new, y_new, epochs=settings.LSTM_FINE_TUNE_EPOCHS, verbose=0,
+                              callbacks=callbacks)
+                    meta = {
+                        **meta,
+                        "last_dates": {**meta["last_dates"], **last_dates},
+                        "trained_at": now.isoformat(),
+                    }
+                    # Series absent this run keep their stored scalers.
+                    artifact.save(model, {**stored, **scalers}, meta)
+                    print(f"LSTM {key}: fine-tuned on {len(X_new)} new windows")
+                    return model, scalers, scaled
+
+    scalers = {name: MinMaxScaler() for name in series}
+    scaled = {
+        name: scalers[name].fit_transform(s.to_numpy().reshape(-1, 1)) for name, s in series.items()
+    }
+    X, y = _cap_windows(*_pooled_windows(scaled, horizon=horizon), settings.LSTM_MAX_TRAIN_WINDOWS)
+    model = build_model(horizon=horizon)
+    history = model.fit(X, y, epochs=FULL_EPOCHS, verbose=0, callbacks=callbacks)
+    if artifact is not None:
+        artifact.save(
+            model,
+            scalers,
+            {
+                "last_dates": last_dates,
+                "trained_at": now.isoformat(),
+                "full_trained_at": now.isoformat(),
+                "horizon": horizon,
+                "baseline_loss": max(float(history.history["loss"][-1]), 1e-6),
+            },
+        )
+        print(f"LSTM {key}: full training on {len(series)} series ({reason})")
+    return model, scalers, scaled
+
+
+def compiled_step(model):
+    """Graph-compiled forward pass, skipping ``predict``'s per-call data pipeline."""
+    import tensorflow as tf
+
+    return tf.function(lambda x: model(x, training=False), reduce_retracing=True)
+
+
+def rollout(model, batch, steps: int, step_fn=None) -> np.ndarray:
+    """Forecast ``steps`` ahead for a ``(n, WINDOW, 1)`` batch of scaled windows.
+
+    A direct model answers in one forward pass; a one-step model is fed its own
+    predictions through a compiled step, one call per step for the whole batch.
+    A ``NumpyLSTM`` runtime does the same without TensorFlow.
+    """
+    if isinstance(model, NumpyLSTM):
+        return model.rollout(batch, steps)
+    import tensorflow as tf
+
+    x = tf.convert_to_tensor(batch, dtype=tf.float32)
+    if model.output_shape[-1] >= steps:
+        return model(x, training=False).numpy()[:, :steps]
+    step_fn = step_fn or compiled_step(model)
     preds = []
-    last_input = scaled[-10:]
     for _ in range(steps):
-        pred = model.predict(last_input.reshape(1, 10, 1), verbose=0)
-        preds.append(pred[0][0])
-        last_input = np.vstack((last_input[1:], pred))
+        pred = step_fn(x)
+        preds.append(pred)
+        x = tf.concat([x[:, 1:], tf.reshape(pred, (-1, 1, 1))], axis=1)
+    return tf.concat(preds, axis=1).numpy()
+
+
+def _forecast(model, scalers, scaled, steps):
+    """Forecast every series together from its last window."""
+    names = list(scaled)
+    batch = np.stack([scaled[name][-WINDOW:] for name in names])
+    preds = rollout(model, batch, steps)
+    return {
+        name: scalers[name].inverse_transform(preds[i].reshape(-1, 1)).flatten()
+        for i, name in enumerate(names)
+    }
+
+
+def _as_series(df):
+    df = df.set_index("date")
+    df.index = pd.to_datetime(df.index)
+    return df["percentage"].astype(float)
+
+
+def train_lstm(df, steps: int = 4, key: str = None):
+    """Train an LSTM model and predict future values.
+
+    In ``LSTM_FORECAST_MODE = "direct"`` the model outputs all ``steps`` at once
+    when there is enough history; otherwise it predicts one step and recurses.
+
+    With a ``key`` naming the series, the trained model and scaler are kept
+    under ``ML_ARTIFACT_DIR/lstm/<key>`` and later calls warm-start from them.
+    """
+    series = _as_series(df)
+    horizon = choose_horizon([len(series)], steps)
+    model, scalers, scaled = _fit_model({"series": series}, key, datetime.now(), horizon)
+    return _forecast(model, scalers, scaled, steps)["series"]
+
+
+def train_global_lstm(frames: dict, steps: int = 4, key: str = None, deadline: float = None) -> dict:
+    """Train one LSTM across several series and forecast them all in one batch.
 
-    inv_preds = scaler.inverse_transform(np.array(preds).reshape(-1, 1)).flatten()
-    return inv_preds
\ No newline at end of file
+    ``frames`` maps a series name to a ``date``/``percentage`` frame. Series
+    with no more rows than one window are left out of the result. Training
+    stops early once ``deadline`` (``time.monotonic()``) has passed.
+    """
+    series = {name: _as_series(df) for name, df in frames.items()}
+    series = {name: s for name, s in series.items() if len(s) > WINDOW}
+    if not series:
+        return {}
+    horizon = choose_horizon([len(s) for s in series.values()], steps)
+    model, scalers, scaled = _fit_model(series, key, datetime.now(), horizon, deadline)
+    return _forecast(model, scalers, scaled, steps)
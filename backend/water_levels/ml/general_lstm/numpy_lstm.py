@@ -0,0 +1,133 @@
+"""Pure-NumPy forward pass for the trained LSTM forecasters.
+
+``export_weights`` saves the weights of a Keras ``LSTM -> [Dropout] -> Dense``
+model to an ``.npz`` file, with the layer activations stored alongside.
+``NumpyLSTM`` loads that file and reproduces the model's inference output
+without importing TensorFlow. That makes serving a saved model cheap in
+latency and memory.
+
+Keras packs the four LSTM gates into one kernel in the order input, forget,
+cell, output; the recurrent activation drives the i/f/o gates and
+``activation`` the cell candidate and the output.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+ACTIVATIONS = {
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": lambda x: np.clip(x / 6.0 + 0.5, 0.0, 1.0),
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "linear": lambda x: x,
+}
+
+
+def _activation_name(layer, key):
+    name = layer.get_config()[key]
+    name = name if isinstance(name, str) else name.get("config", {}).get("name", str(name))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"{layer.name}: activation {name!r} has no NumPy implementation")
+    return name
+
+
+def keras_weights(model) -> dict:
+    """Arrays and activation names of a Keras ``LSTM -> [Dropout] -> Dense`` model."""
+    kinds = [type(layer).__name__ for layer in model.layers]
+    if kinds[0] != "LSTM" or kinds[-1] != "Dense" or set(kinds[1:-1]) - {"Dropout"}:
+        raise ValueError(f"unsupported layer stack {kinds}; expected LSTM, [Dropout], Dense")
+    lstm, dense = model.layers[0], model.layers[-1]
+    if lstm.get_config().get("return_sequences"):
+        raise ValueError("LSTM layers returning sequences are not supported")
+
+    lstm_weights = lstm.get_weights()
+    kernel, recurrent = lstm_weights[:2]
+    bias = lstm_weights[2] if len(lstm_weights) > 2 else np.zeros(kernel.shape[1])
+    dense_weights = dense.get_weights()
+    dense_bias = dense_weights[1] if len(dense_weights) > 1 else np.zeros(dense_weights[0].shape[1])
+
+    return {
+        "kernel": kernel,
+        "recurrent_kernel": recurrent,
+        "bias": bias,
+        "dense_kernel": dense_weights[0],
+        "dense_bias": dense_bias,
+        "activation": _activation_name(lstm, "activation"),
+        "recurrent_activation": _activation_name(lstm, "recurrent_activation"),
+        "dense_activation": _activation_name(dense, "activation"),
+    }
+
+
+def export_weights(model, path) -> Path:
+    """Write ``model``'s LSTM and Dense weights and activations to ``path`` (.npz)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez(f, format_version=FORMAT_VERSION, **keras_weights(model))
+    return path
+
+
+class NumpyLSTM:
+    """Inference-only LSTM built from ``keras_weights`` arrays."""
+
+    def __init__(self, weights: dict):
+        self.kernel = np.asarray(weights["kernel"], dtype=np.float32)
+        self.recurrent_kernel = np.asarray(weights["recurrent_kernel"], dtype=np.float32)
+        self.bias = np.asarray(weights["bias"], dtype=np.float32)
+        self.dense_kernel = np.asarray(weights["dense_kernel"], dtype=np.float32)
+        self.dense_bias = np.asarray(weights["dense_bias"], dtype=np.float32)
+        self.activation = ACTIVATIONS[str(weights["activation"])]
+        self.recurrent_activation = ACTIVATIONS[str(weights["recurrent_activation"])]
+        self.dense_activation = ACTIVATIONS[str(weights["dense_activation"])]
+        self.units = self.recurrent_kernel.shape[0]
+        self.horizon = self.dense_kernel.shape[1]
+
+    @classmethod
+    def load(cls, path):
+        """Load an ``export_weights`` file."""
+        with np.load(path) as data:
+            if int(data["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported weights format {int(data['format_version'])}")
+            return cls({name: data[name] for name in data.files})
+
+    @classmethod
+    def from_keras(cls, model):
+        return cls(keras_weights(model))
+
+    def __call__(self, x) -> np.ndarray:
+        """Forward pass for a ``(n, timesteps, features)`` batch; returns ``(n, horizon)``."""
+        x = np.asarray(x, dtype=np.float32)
+        u = self.units
+        # Input projections for every timestep at once; only the recurrence is sequential.
+        projected = x @ self.kernel + self.bias
+        h = np.zeros((x.shape[0], u), dtype=np.float32)
+        c = np.zeros_like(h)
+        for t in range(x.shape[1]):
+            z = projected[:, t] + h @ self.recurrent_kernel
+            i = self.recurrent_activation(z[:, :u])
+            f = self.recurrent_activation(z[:, u:2 * u])
+            g = self.activation(z[:, 2 * u:3 * u])
+            o = self.recurrent_activation(z[:, 3 * u:])
+            c = f * c + i * g
+            h = o * self.activation(c)
+        return self.dense_activation(h @ self.dense_kernel + self.dense_bias)
+
+    def rollout(self, batch, steps: int) -> np.ndarray:
+        """``steps``-ahead forecasts for a batch of windows, recursing if the model is one-step."""
+        x = np.asarray(batch, dtype=np.float32)
+        if self.horizon >= steps:
+            return self(x)[:, :steps]
+        preds = np.empty((len(x), steps), dtype=np.float32)
+        for step in range(steps):
+            pred = self(x)[:, 0]
+            preds[:, step] = pred
+            x = np.concatenate([x[:, 1:], pred.reshape(-1, 1, 1)], axis=1)
+        return preds
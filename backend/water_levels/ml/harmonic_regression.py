@@ -0,0 +1,72 @@
+"""Closed-form trend plus seasonal-harmonic regression over many series at once.
+
+Each series is fitted to ``a + b*t + sum_k(c_k*sin(2*pi*k*t/period) + d_k*cos(...))``
+over its own positions ``t = 0..n-1``. Series of different lengths are padded
+into one matrix, and missing values are masked out of the normal equations.
+That gives every series a small ``(p, p)`` system, and the whole stack is
+solved in one batched call. The design matrix for the forecast steps is built
+for all series and horizons together, so nothing loops in Python per series
+or per step.
+"""
+
+import numpy as np
+
+
+def design_matrix(t, period: float, harmonics: int = 1, trend_scale: float = 1.0) -> np.ndarray:
+    """Columns ``[1, t/trend_scale, sin_1, cos_1, ..., sin_k, cos_k]`` for positions ``t``.
+
+    ``t`` may have any shape; the columns are added as a last axis. Scaling the
+    trend keeps every column near unit size, which keeps the normal equations
+    well conditioned on long histories.
+    """
+    t = np.asarray(t, dtype=float)
+    k = np.arange(1, harmonics + 1)
+    angle = 2 * np.pi * t[..., None] * k / period
+    seasonal = np.stack([np.sin(angle), np.cos(angle)], axis=-1).reshape(*t.shape, 2 * harmonics)
+    return np.concatenate(
+        [np.ones_like(t)[..., None], t[..., None] / trend_scale, seasonal], axis=-1
+    )
+
+
+def pad_series(series) -> np.ndarray:
+    """Left-align 1-D sequences of any length into a NaN-padded ``(n, max_len)`` array."""
+    arrays = [np.asarray(s, dtype=float).ravel() for s in series]
+    out = np.full((len(arrays), max((len(a) for a in arrays), default=0)), np.nan)
+    for row, a in zip(out, arrays):
+        row[:len(a)] = a
+    return out
+
+
+def fit_coefficients(Y, lengths, period: float, harmonics: int = 1) -> np.ndarray:
+    """Least-squares coefficients ``(n, p)`` for each row of the NaN-padded ``Y``.
+
+    Positions past ``lengths[i]`` and NaN values are left out of row ``i``'s
+    fit. A row with too few points for a unique solution gets the minimum-norm
+    solution. The trend coefficient is per ``Y.shape[1]`` positions, matching
+    ``design_matrix(..., trend_scale=Y.shape[1])``.
+    """
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    X = design_matrix(np.arange(Y.shape[1]), period, harmonics, trend_scale=max(Y.shape[1], 1))
+    within = np.arange(Y.shape[1]) < np.asarray(lengths)[:, None]
+    W = (within & np.isfinite(Y)).astype(float)
+    Yw = np.where(W > 0, Y, 0.0)
+    p = X.shape[1]
+    # Row i's X'WX is sum_t W[i, t] * outer(X[t], X[t]): one matmul for all rows.
+    XtWX = (W @ (X[:, :, None] * X[:, None, :]).reshape(-1, p * p)).reshape(-1, p, p)
+    XtWy = Yw @ X
+    return np.einsum("npq,nq->np", np.linalg.pinv(XtWX, hermitian=True), XtWy)
+
+
+def harmonic_forecast(series, steps: int, period: float = 52, harmonics: int = 1) -> np.ndarray:
+    """Fit every sequence in ``series`` and forecast ``steps`` past its own end.
+
+    Returns an ``(n_series, steps)`` array. Row ``i`` continues from position
+    ``len(series[i])``, so the sequences do not have to share a length.
+    """
+    Y = pad_series(series)
+    lengths = np.array([len(np.asarray(s).ravel()) for s in series])
+    beta = fit_coefficients(Y, lengths, period, harmonics)
+    future = design_matrix(
+        lengths[:, None] + np.arange(steps), period, harmonics, trend_scale=max(Y.shape[1], 1)
+    )
+    return np.einsum("nsp,np->ns", future, beta)
@@ -0,0 +1,170 @@
+"""Per-series ARIMA order selection by AIC, searched in parallel and cached.
+
+The differencing order ``d`` is fixed first by repeated KPSS tests, because
+AICs of models with different ``d`` are not comparable. The search then runs in
+stages, each stage's fits for every series going to the process pool together:
+
+1. every ``(p, d, q)`` with ``p, q <= ARIMA_ORDER_MAX_PQ`` is scored with a
+   short optimiser run;
+2. candidates more than ``ARIMA_ORDER_AIC_MARGIN`` above the series' best AIC
+   are pruned, keeping at most ``KEEP``, and the survivors are refitted in full;
+3. the best of them gets a seasonal AR or MA term at the series' period (only
+   with two full seasons of data);
+4. the combined seasonal ARMA is tried only where one of those terms beat the
+   non-seasonal fit.
+
+Seasonal fits at a weekly period cost seconds each, so pruning before them
+is what keeps the search affordable. The winner is stored per series in the
+ARIMA state (``arima_state``) with the time it was chosen, and reused without
+searching until ``ARIMA_ORDER_TTL_DAYS`` have passed.
+"""
+
+import time
+import warnings
+
+import numpy as np
+from django.conf import settings
+
+from water_levels.ml.arima_state import get_arima_state
+from water_levels.ml.forecasting import ARIMA, NO_SEASON
+from water_levels.ml.parallel import fit_many
+
+SCREEN_MAXITER = 20
+KEEP = 2
+
+
+def choose_d(values, max_d: int = 2, alpha: float = 0.05) -> int:
+    """Smallest ``d`` whose differenced series passes a KPSS level-stationarity test."""
+    from statsmodels.tsa.stattools import kpss
+
+    y = np.asarray(values, dtype=float)
+    y = y[np.isfinite(y)]
+    for d in range(max_d + 1):
+        if d == max_d or len(y) < 10 or np.ptp(y) == 0:
+            return d
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore")
+            p_value = kpss(y, regression="c", nlags="auto")[1]
+        if p_value >= alpha:
+            return d
+        y = np.diff(y)
+    return max_d
+
+
+def _score(values, order, seasonal_order, maxiter: int) -> float:
+    """AIC of ``ARIMA(order, seasonal_order)`` on ``values``; inf if the fit is unusable."""
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore")
+        result = ARIMA(values, order=order, seasonal_order=seasonal_order).fit(
+            method_kwargs={"maxiter": maxiter}
+        )
+    aic = float(result.aic)
+    return aic if np.isfinite(aic) else np.inf
+
+
+def search_orders(series: dict, seasonal_period: int = None, maxiter: int = 50,
+                  label: str = "order search") -> dict:
+    """Search every ``{name: series}`` together; returns ``{name: (order, seasonal_order, aic)}``.
+
+    Series where no candidate could be fitted are left out.
+    """
+    values = {name: np.asarray(s, dtype=float) for name, s in series.items()}
+    values = {name: v[np.isfinite(v)] for name, v in values.items()}
+    if not values:
+        return {}
+    max_pq = settings.ARIMA_ORDER_MAX_PQ
+    final = {name: {} for name in values}
+
+    def run(candidates, iterations):
+        jobs = {
+            (name, order, seasonal): (values[name], order, seasonal, iterations)
+            for name, cands in candidates.items()
+            for order, seasonal in cands
+        }
+        results, _ = fit_many(_score, jobs, label=label)
+        return {job: results.get(job, np.inf) for job in jobs}
+
+    d = {name: choose_d(v) for name, v in values.items()}
+    screened = run({
+        name: [((p, d[name], q), NO_SEASON) for p in range(max_pq + 1) for q in range(max_pq + 1)]
+        for name in values
+    }, SCREEN_MAXITER)
+
+    survivors = {}
+    for name in values:
+        scores = sorted(
+            (aic, order) for (n, order, _), aic in screened.items() if n == name and np.isfinite(aic)
+        )
+        if scores:
+            margin = scores[0][0] + settings.ARIMA_ORDER_AIC_MARGIN
+            survivors[name] = [(order, NO_SEASON) for aic, order in scores if aic <= margin][:KEEP]
+    for (name, order, season), aic in run(survivors, maxiter).items():
+        final[name][(order, season)] = aic
+
+    def best_of(name):
+        return min(final[name].items(), key=lambda item: item[1])
+
+    seasonal = {
+        name: [(best_of(name)[0][0], (1, 0, 0, seasonal_period)),
+               (best_of(name)[0][0], (0, 0, 1, seasonal_period))]
+        for name, v in values.items()
+        if final[name] and seasonal_period and len(v) >= 2 * seasonal_period
+    }
+    for (name, order, season), aic in run(seasonal, maxiter).items():
+        final[name][(order, season)] = aic
+
+    combined = {}
+    for name, cands in seasonal.items():
+        order = cands[0][0]
+        base = final[name][(order, NO_SEASON)]
+        if any(final[name][cand] < base for cand in cands):
+            combined[name] = [(order, (1, 0, 1, seasonal_period))]
+    for (name, order, season), aic in run(combined, maxiter).items():
+        final[name][(order, season)] = aic
+
+    best = {}
+    for name, scores in final.items():
+        if scores:
+            (order, season), aic = best_of(name)
+            if np.isfinite(aic):
+                best[name] = (order, season, aic)
+    return best
+
+
+def select_orders(series: dict, seasonal_period: int = None, key: str = None, maxiter: int = 50,
+                  label: str = "order search") -> dict:
+    """``{name: (order, seasonal_order)}`` for ``series``, searching only where needed.
+
+    With ``key`` each choice is stored as ``"{key}/{name}"`` and reused until
+    it is ``ARIMA_ORDER_TTL_DAYS`` old. Series the search could not fit are
+    left out; callers fall back to their default order.
+    """
+    store = get_arima_state() if key else None
+    now = time.time()
+    chosen, todo = {}, {}
+    for name, s in series.items():
+        saved = store.get(f"{key}/{name}").get("selected") if store else None
+        if (
+            saved
+            and saved.get("seasonal_period") == seasonal_period
+            and now - saved["at"] < settings.ARIMA_ORDER_TTL_DAYS * 86400
+        ):
+            chosen[name] = (tuple(saved["order"]), tuple(saved["seasonal_order"]))
+        else:
+            todo[name] = s
+
+    t0 = time.perf_counter()
+    found = search_orders(todo, seasonal_period, maxiter, label) if todo else {}
+    for name, (order, season, aic) in found.items():
+        chosen[name] = (order, season)
+        if store is not None:
+            store.put(f"{key}/{name}", selected={
+                "order": list(order), "seasonal_order": list(season), "aic": aic,
+                "seasonal_period": seasonal_period, "at": now,
+            })
+    if series:
+        print(
+            f"[{label}] {len(series) - len(todo)} cached, {len(found)}/{len(todo)} searched "
+            f"in {time.perf_counter() - t0:.1f}s"
+        )
+    return {name: chosen[name] for name in series if name in chosen}
@@ -0,0 +1,72 @@
+"""Fit independent series concurrently in a process pool.
+
+Model fits are CPU-bound Python and hold the GIL, so threads do not help; each
+series is fitted in a worker process instead and the results come back to the
+caller, which does the single DB write. Workers only run the pure fitting
+function, never the ORM, so they need no Django setup or DB connection.
+
+Scheduled runs happen inside Celery's prefork workers, which are daemonic, and
+``multiprocessing`` refuses to start children from a daemonic process. There
+the pool is started through billiard, Celery's fork of ``multiprocessing``,
+which allows it.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+
+def fit_workers(jobs: int) -> int:
+    """Worker processes to use for ``jobs`` fits: ``ML_FIT_WORKERS`` capped by cores and jobs."""
+    return max(1, min(settings.ML_FIT_WORKERS, os.cpu_count() or 1, jobs))
+
+
+def fit_many(fn, jobs: dict, workers: int = None, label: str = "fit"):
+    """Call ``fn(*args)`` for every ``{name: args}`` in ``jobs``.
+
+    Returns ``(results, errors)``: ``{name: value}`` for the fits that
+    succeeded and ``{name: exception}`` for those that raised, so one bad
+    series does not lose the others. ``fn`` and its arguments must be
+    picklable, i.e. a module-level function with plain data.
+    """
+    workers = workers or fit_workers(len(jobs))
+    results, errors = {}, {}
+    t0 = time.perf_counter()
+    if workers <= 1:
+        for name, args in jobs.items():
+            try:
+                results[name] = fn(*args)
+            except Exception as exc:
+                errors[name] = exc
+    elif multiprocessing.current_process().daemon:
+        import billiard
+
+        pool = billiard.get_context("spawn").Pool(workers)
+        try:
+            pending = {name: pool.apply_async(fn, args) for name, args in jobs.items()}
+            for name, result in pending.items():
+                try:
+                    results[name] = result.get()
+                except Exception as exc:
+                    errors[name] = exc
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            futures = {name: pool.submit(fn, *args) for name, args in jobs.items()}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as exc:
+                    errors[name] = exc
+    if jobs:
+        print(
+            f"[{label}] {len(results)}/{len(jobs)} series fitted on {workers} "
+            f"worker(s) in {time.perf_counter() - t0:.1f}s"
+        )
+    return results, errors
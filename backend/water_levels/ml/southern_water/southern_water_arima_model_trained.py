@@ -1,56 +1,11 @@
-import warnings
-import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
-from datetime import timedelta
-from water_levels.models import SouthernWaterReservoirLevel, SouthernWaterReservoirForecast
+from water_levels.ml.engine import run_forecasts
 
-def generate_southern_arima_forecast():
-    
-    warnings.filterwarnings("ignore")
-    qs = SouthernWaterReservoirLevel.objects.order_by("reservoir", "date")
-    if not qs.exists():
-        print("No data in SouthernWaterReservoirLevel")
-        return "no data"
-
-    for reservoir in qs.values_list("reservoir", flat=True).distinct():
-        res_qs = qs.filter(reservoir=reservoir)
-        if res_qs.count() < 12:
-            print(f"Skipping {reservoir}: not enough data ({res_qs.count()})")
-            continue
-
-        df = pd.DataFrame(res_qs.values("date", "current_level"))
-        df["date"] = pd.to_datetime(df["date"])
-        df = df.set_index("date").sort_index()
-        df = df.resample("W").ffill()
-
-
-        if df["current_level"].isnull().all():
-            continue
 
-        df["current_level"] = df["current_level"].interpolate()
-
-        if df["current_level"].nunique() == 1:
-            print(f"{reservoir} is constant value, skipping.")
-            continue
-
-        try:
-            model = ARIMA(df["current_level"], order=(2, 1, 2))
-            fit = model.fit()
-            forecast = fit.forecast(steps=24)
-        except Exception as e:
-            print(f"ARIMA fit error for {reservoir}: {e}")
-            continue
-
-        last_date = df.index[-1].date()
-        for i, val in enumerate(forecast):
-            target = last_date + timedelta(weeks=i + 1)
-            SouthernWaterReservoirForecast.objects.update_or_create(
-                reservoir=reservoir,
-                date=target,
-                model_type="ARIMA",
-                defaults={"predicted_level": round(float(val), 2)},
-            )
+def generate_southern_arima_forecast():
+    """Generate ARIMA forecasts for Southern Water reservoirs."""
+    run_forecasts("southern_water", models=("ARIMA",))
     return "arima"
 
+
 if __name__ == "__main__":
-    generate_southern_arima_forecast()
\ No newline at end of file
+    generate_southern_arima_forecast()
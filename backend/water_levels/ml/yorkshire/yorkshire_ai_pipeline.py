@@ -9,6 +9,7 @@ if __name__ == "__main__":
     django.setup()
 
 from water_levels.models import YorkshireReservoirData, YorkshireWaterPrediction
+from water_levels.utils import upsert_forecasts
 
 
 def generate_yorkshire_predictions() -> None:
@@ -27,16 +28,18 @@ def generate_yorkshire_predictions() -> None:
     last_value = float(reservoir_roll.iloc[-1])
     last_date = df.index[-1]
 
-    for i in range(1, 31):
-        target_date = last_date + pd.Timedelta(days=i)
-        YorkshireWaterPrediction.objects.update_or_create(
-            date=target_date,
-            model_type="LSTM",
-            defaults={
+    upsert_forecasts(
+        YorkshireWaterPrediction,
+        [
+            {
+                "date": (last_date + pd.Timedelta(days=i)).date(),
+                "model_type": "LSTM",
                 "predicted_reservoir_percent": round(last_value, 2),
                 "predicted_demand_mld": 0.0,
-            },
-        )
+            }
+            for i in range(1, 31)
+        ],
+    )
 
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ from water_levels.models import EAwaterLevel, EAwaterPrediction, EAwaterPredicti
 def calculate_EA_stations_water_prediction_accuracy():
     """ This script calculates the accuracy of EA water level predictions by comparing them with actual values."""
     today = datetime.today().date()
-    model_types = ['ARIMA', 'LSTM', 'REGRESSION']
+    model_types = ['ARIMA', 'LSTM', 'REGRESSION', 'ENSEMBLE']
 
     regions = EAwaterLevel.objects.values_list('station__region', flat=True).distinct()
     for region in regions:
@@ -48,6 +48,7 @@ class ScottishWaterForecast(models.Model):
             ("ARIMA", "ARIMA"),
             ("LSTM", "LSTM"),
             ("REGRESSION", "REGRESSION"),
+            ("ENSEMBLE", "ENSEMBLE"),
         ),
     )
 
@@ -71,6 +72,7 @@ class ScottishWaterRegionalForecast(models.Model):
             ("ARIMA", "ARIMA"),
             ("LSTM", "LSTM"),
             ("REGRESSION", "REGRESSION"),
+            ("ENSEMBLE", "ENSEMBLE"),
         ),
     )
 
@@ -144,6 +146,7 @@ class SevernTrentReservoirForecast(models.Model):
             ("ARIMA", "ARIMA"),
             ("LSTM", "LSTM"),
             ("REGRESSION", "REGRESSION"),
+            ("ENSEMBLE", "ENSEMBLE"),
         ),
     )
 
@@ -179,6 +182,7 @@ class YorkshireWaterPrediction(models.Model):
             ("ARIMA", "ARIMA"),
             ("LSTM", "LSTM"),
             ("REGRESSION", "REGRESSION"),
+            ("ENSEMBLE", "ENSEMBLE"),
         ),
     )
 
@@ -253,6 +257,7 @@ class SouthernWaterReservoirForecast(models.Model):
             ("ARIMA", "ARIMA"),
             ("LSTM", "LSTM"),
             ("REGRESSION", "REGRESSION"),
+            ("ENSEMBLE", "ENSEMBLE"),
         ),
     )
 
@@ -305,6 +310,23 @@ class EAwaterLevel(models.Model):
         unique_together = ("station", "date")
 
 
+class EAwaterSyncState(models.Model):
+    """Newest reading date ingested for each EA station measure."""
+
+    station = models.ForeignKey(
+        EAwaterStation, on_delete=models.CASCADE, related_name="sync_states"
+    )
+    measure = models.CharField(max_length=255)
+    last_reading_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("station", "measure")
+
+    def __str__(self):
+        return f"{self.measure} @ {self.last_reading_date}"
+
+
 class EAwaterPrediction(models.Model):
     """Predicted groundwater levels for each UK region."""
 
@@ -318,6 +340,21 @@ class EAwaterPrediction(models.Model):
         unique_together = ("region", "model_type", "date")
 
 
+class EAwaterStationPrediction(models.Model):
+    """Predicted groundwater levels for each individual EA station."""
+
+    station = models.ForeignKey(
+        EAwaterStation, on_delete=models.CASCADE, related_name="predictions"
+    )
+    model_type = models.CharField(max_length=20)
+    date = models.DateField()
+    predicted_value = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("station", "model_type", "date")
+
+
 class EAwaterPredictionAccuracy(models.Model):
     """Store accuracy of groundwater predictions once actuals are available."""
 
@@ -332,3 +369,19 @@ class EAwaterPredictionAccuracy(models.Model):
     class Meta:
         unique_together = ("region", "model_type", "date")
 
+
+# Scraper models
+class ScraperPageCache(models.Model):
+    """HTTP validators and content hash of the last page fetched from a source URL."""
+
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    changed = models.BooleanField(default=True)
+    checked_at = models.DateTimeField(null=True, blank=True)
+    changed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.url} ({'changed' if self.changed else 'unchanged'})"
+
@@ -0,0 +1,193 @@
+"""Shared plumbing for the provider scrapers.
+
+Each provider subclasses ``BaseScraper`` and implements ``scrape()``. Requests
+go through ``self.get`` (or ``self.conditional_get``), which uses one pooled
+keep-alive session per run, spaces calls per host, holds a per-source
+concurrency slot, and retries connection errors and 429/5xx replies with
+jittered exponential backoff. Work is wrapped in ``self.phase("fetch" |
+"parse" | "write")`` so every run ends with one comparable ``ScrapeResult``
+summary line.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import requests
+from django.conf import settings
+
+from water_levels.scraper.http import HostRateLimiter, build_session, conditional_get
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+SCRAPERS = {}
+
+
+@dataclass
+class ScrapeResult:
+    """Outcome of one scraper run.
+
+    ``timings`` holds seconds per phase summed over all threads, so with
+    concurrent fetches it can exceed ``seconds`` (wall time). ``value`` is what
+    the provider's module-level entry point returns.
+    """
+
+    source: str
+    status: str = "ok"
+    rows_fetched: int = 0
+    rows_written: int = 0
+    requests: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    timings: dict = field(default_factory=dict)
+    error: str = ""
+    value: object = None
+
+    def summary(self) -> str:
+        phases = ", ".join(f"{name} {secs:.2f}s" for name, secs in self.timings.items())
+        line = (
+            f"[scrape] {self.source} {self.status} in {self.seconds:.2f}s: "
+            f"{self.rows_fetched} rows fetched, {self.rows_written} written"
+        )
+        write_seconds = self.timings.get("write")
+        if self.rows_written and write_seconds:
+            line += f" ({self.rows_written / write_seconds:,.0f} rows/sec)"
+        line += f" | {phases or 'no phases'} | {self.requests} request(s), {self.retries} retries"
+        if self.error:
+            line += f" | {self.error}"
+        return line
+
+
+class BaseScraper:
+    """Base class for a provider scraper; see the module docstring."""
+
+    source = ""
+    headers = {}
+    timeout = 20
+    concurrency_setting = None
+    rate_setting = None
+
+    _slots = {}
+    _slots_lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.source:
+            SCRAPERS[cls.source] = cls
+
+    def __init__(self, concurrency: int = None):
+        self.concurrency = concurrency or self.configured_concurrency()
+        rate = getattr(settings, self.rate_setting, 0) if self.rate_setting else 0
+        self.limiter = HostRateLimiter(rate)
+        self.max_retries = settings.SCRAPER_MAX_RETRIES
+        self.backoff_seconds = settings.SCRAPER_BACKOFF_SECONDS
+        self.backoff_max_seconds = settings.SCRAPER_BACKOFF_MAX_SECONDS
+        self.result = ScrapeResult(source=self.source)
+        self._session = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def configured_concurrency(cls) -> int:
+        limit = settings.SCRAPER_CONCURRENCY.get(cls.source)
+        if limit is None and cls.concurrency_setting:
+            limit = getattr(settings, cls.concurrency_setting)
+        return max(1, int(limit or 1))
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = build_session(pool_size=self.concurrency, headers=self.headers)
+        return self._session
+
+    @property
+    def slot(self):
+        """Semaphore bounding in-flight requests for this source across the process."""
+        with self._slots_lock:
+            if self.source not in self._slots:
+                self._slots[self.source] = threading.BoundedSemaphore(self.configured_concurrency())
+            return self._slots[self.source]
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.result.timings[name] = self.result.timings.get(name, 0.0) + elapsed
+
+    def _count(self, attr, n=1):
+        with self._lock:
+            setattr(self.result, attr, getattr(self.result, attr) + n)
+
+    def backoff(self, attempt, response=None) -> float:
+        """Full-jitter exponential delay, never shorter than a numeric Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_seconds * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.backoff_max_seconds))
+        return delay
+
+    def get(self, url, **kwargs):
+        """GET ``url`` with rate limiting, a concurrency slot and retries.
+
+        After the last attempt a retryable status is returned for the caller's
+        ``raise_for_status``; a connection error is re-raised.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait(url)
+            response, error = None, None
+            with self.slot, self.phase("fetch"):
+                self._count("requests")
+                try:
+                    response = self.session.get(url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                return response
+            if attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                return response
+            delay = self.backoff(attempt, response)
+            reason = error or f"HTTP {response.status_code}"
+            print(f"{self.source}: retrying {url} in {delay:.1f}s ({reason})")
+            self._count("retries")
+            time.sleep(delay)
+
+    def conditional_get(self, url, force=False, fingerprint=None, **kwargs):
+        """``http.conditional_get`` routed through this scraper's ``get``."""
+        return conditional_get(url, session=self, force=force, fingerprint=fingerprint, **kwargs)
+
+    def scrape(self, **kwargs):
+        raise NotImplementedError
+
+    def run(self, **kwargs) -> ScrapeResult:
+        """Call ``scrape`` and return its result, printing the summary line."""
+        started = time.perf_counter()
+        try:
+            self.result.value = self.scrape(**kwargs)
+        except Exception as e:
+            self.result.status = "error"
+            self.result.error = str(e)
+            raise
+        finally:
+            self.result.seconds = time.perf_counter() - started
+            self.close()
+            print(self.result.summary())
+        return self.result
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,132 +1,283 @@
-
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from water_levels.models import EAwaterStation, EAwaterLevel
-from water_levels.utils import get_region
-
-
-def extract_EA_stations_water_levels():
-    stations_url = "https://environment.data.gov.uk/hydrology/id/stations"
-    params = {"observedProperty": "groundwaterLevel"}
-    response = requests.get(
-        stations_url, params=params, headers={"Accept": "application/json"}
-    )
-    response.raise_for_status()
-    data = response.json()
-
-    for item in data.get("items", []):
-        station_id = item["notation"]
-        name = item.get("label", station_id)
-        lat = float(item.get("lat", 0))
-        lon = float(item.get("long", 0))
-        region = get_region(lat, lon)
-
-        station, _ = EAwaterStation.objects.get_or_create(
-            station_id=station_id,
-            defaults={
-                "name": name,
-                "region": region,
-                "latitude": lat,
-                "longitude": lon,
-            },
+
+from django.conf import settings
+from django.db.models import Max
+
+from water_levels.models import EAwaterStation, EAwaterLevel, EAwaterSyncState
+from water_levels.scraper.base import BaseScraper
+from water_levels.utils import bulk_upsert, get_region
+
+STATIONS_URL = "https://environment.data.gov.uk/hydrology/id/stations"
+MEASURES_URL = "https://environment.data.gov.uk/hydrology/id/measures"
+READINGS_URL = "https://environment.data.gov.uk/hydrology/data/readings"
+
+
+def _dipped_measure_id(station_id):
+    return f"http://environment.data.gov.uk/hydrology/id/measures/{station_id}-gw-dipped-i-mAOD-qualified"
+
+
+def _readings_params(measure_id, since=None):
+    """Query parameters for a measure's readings, limited to those after ``since``."""
+    params = {"measure": measure_id, "_sort": "date"}
+    if since is not None:
+        params["min-date"] = since.isoformat()
+    return params
+
+
+class EAwaterLevelWriter:
+    """Buffer readings and upsert them in chunks, one transaction per chunk.
+
+    Readings for the same station and date collapse to the last one added, so a
+    chunk never conflicts with itself. ``rows_per_second`` covers time spent
+    writing only, not fetching.
+    """
+
+    def __init__(self, chunk_size: int = None):
+        self.chunk_size = chunk_size or settings.EA_WRITE_CHUNK_SIZE
+        self._pending = {}
+        self.rows = 0
+        self.seconds = 0.0
+
+    def add(self, station, date, value, quality="Unknown"):
+        self._pending[(station.pk, date)] = EAwaterLevel(
+            station=station, date=date, value=value, quality=quality
         )
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
 
-        measure_id = f"http://environment.data.gov.uk/hydrology/id/measures/{station_id}-gw-dipped-i-mAOD-qualified"
-        readings_url = "https://environment.data.gov.uk/hydrology/data/readings"
-        params = {"measure": measure_id, "_limit": 10000}
-        readings_response = requests.get(
-            readings_url,
-            params=params,
-            headers={"Accept": "application/json"},
-            timeout=10,
+    def flush(self):
+        if not self._pending:
+            return
+        started = time.perf_counter()
+        self.rows += bulk_upsert(
+            EAwaterLevel,
+            list(self._pending.values()),
+            unique_fields=["station", "date"],
+            update_fields=["value", "quality"],
         )
-        readings = readings_response.json().get("items", [])
-
-        if readings:
-            latest = max(
-                readings,
-                key=lambda r: datetime.strptime(
-                    r.get("dateTime") or r.get("date"),
-                    (
-                        "%Y-%m-%dT%H:%M:%S"
-                        if "T" in (r.get("dateTime") or "")
-                        else "%Y-%m-%d"
-                    ),
-                ),
-            )
-            value = latest.get("value")
-            if value is not None and latest.get("quality") != "Missing":
-                dt_str = latest.get("dateTime") or latest.get("date")
-                dt = datetime.strptime(
-                    dt_str, "%Y-%m-%dT%H:%M:%S" if "T" in dt_str else "%Y-%m-%d"
-                ).date()
-                EAwaterLevel.objects.update_or_create(
-                    station=station,
-                    date=dt,
-                    defaults={
-                        "value": value,
-                        "quality": latest.get("quality", "Unknown"),
-                    },
-                )
+        self.seconds += time.perf_counter() - started
+        self._pending = {}
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
 
 
-def import_historical_EAwater_levels():
-    stations_url = "https://environment.data.gov.uk/hydrology/id/stations"
-    params = {"observedProperty": "groundwaterLevel"}
-    response = requests.get(
-        stations_url, params=params, headers={"Accept": "application/json"}
-    )
-    response.raise_for_status()
-    data = response.json()
-
-    for item in data.get("items", []):
-        station_id = item["notation"]
-        name = item.get("label", station_id)
-        lat = float(item.get("lat", 0))
-        lon = float(item.get("long", 0))
-        region = get_region(lat, lon)
-
-        station, _ = EAwaterStation.objects.get_or_create(
-            station_id=station_id,
-            defaults={
-                "name": name,
-                "region": region,
-                "latitude": lat,
-                "longitude": lon,
-            },
+def _load_watermarks():
+    """Return ``{(station_pk, measure): last_reading_date}`` for every synced measure."""
+    return {
+        (state["station_id"], state["measure"]): state["last_reading_date"]
+        for state in EAwaterSyncState.objects.values(
+            "station_id", "measure", "last_reading_date"
         )
+    }
 
-        measures_url = f"https://environment.data.gov.uk/hydrology/id/measures?station={station_id}"
-        measures_response = requests.get(
-            measures_url, headers={"Accept": "application/json"}, timeout=10
+
+def _advance_watermark(watermarks, station, measure, reading_date):
+    key = (station.pk, measure)
+    current = watermarks.get(key)
+    if current is None or reading_date > current:
+        watermarks[key] = reading_date
+        EAwaterSyncState.objects.update_or_create(
+            station=station,
+            measure=measure,
+            defaults={"last_reading_date": reading_date},
         )
-        measures = measures_response.json().get("items", [])
-
-        for measure in measures:
-            measure_id = measure["@id"]
-            readings_url = "https://environment.data.gov.uk/hydrology/data/readings"
-            readings_params = {"measure": measure_id, "_limit": 10000}
-            readings_response = requests.get(
-                readings_url,
-                params=readings_params,
-                headers={"Accept": "application/json"},
-                timeout=10,
-            )
-            readings = readings_response.json().get("items", [])
 
-            for r in readings:
+
+class EAScraper(BaseScraper):
+    """Hydrology API access shared by the latest-reading and historical syncs."""
+
+    headers = {"Accept": "application/json"}
+    timeout = 10
+    concurrency_setting = "EA_FETCH_CONCURRENCY"
+    rate_setting = "EA_REQUESTS_PER_SECOND"
+
+    def iter_measure_readings(self, station, measure_id, since=None, page_size=None):
+        """Yield ``(station, date, value, quality)`` for a measure's usable readings.
+
+        The API is walked with ``_offset``/``_limit`` pages so at most one page is
+        held in memory, and each reading's timestamp is parsed exactly once.
+        """
+        page_size = page_size or settings.EA_READINGS_PAGE_SIZE
+        params = _readings_params(measure_id, since)
+        offset = 0
+        while True:
+            response = self.get(
+                READINGS_URL, params={**params, "_limit": page_size, "_offset": offset}
+            )
+            response.raise_for_status()
+            with self.phase("parse"):
+                items = response.json().get("items", [])
+            self._count("rows_fetched", len(items))
+            for r in items:
                 value = r.get("value")
-                if value is None or r.get("quality") == "Missing":
+                quality = r.get("quality", "Unknown")
+                if value is None or quality == "Missing":
                     continue
                 dt_str = r.get("dateTime") or r.get("date")
-                dt = datetime.strptime(
-                    dt_str, "%Y-%m-%dT%H:%M:%S" if "T" in dt_str else "%Y-%m-%d"
-                ).date()
-                EAwaterLevel.objects.update_or_create(
-                    station=station,
-                    date=dt,
-                    defaults={"value": value, "quality": r.get("quality", "Unknown")},
+                yield station, datetime.fromisoformat(dt_str).date(), value, quality
+            if len(items) < page_size:
+                return
+            offset += page_size
+
+    def list_measures(self, station_id):
+        """``@id`` of every measure the API lists for ``station_id``."""
+        response = self.get(MEASURES_URL, params={"station": station_id})
+        response.raise_for_status()
+        with self.phase("parse"):
+            return [m["@id"] for m in response.json().get("items", [])]
+
+    def sync_station_catalogue(self):
+        """Fetch the EA groundwater station list and create only the stations we lack.
+
+        Returns a mapping of EA ``notation`` to ``EAwaterStation`` for every station in
+        the catalogue.
+        """
+        response = self.get(STATIONS_URL, params={"observedProperty": "groundwaterLevel"})
+        response.raise_for_status()
+        with self.phase("parse"):
+            items = response.json().get("items", [])
+
+        with self.phase("write"):
+            known = EAwaterStation.objects.in_bulk(field_name="station_id")
+            new_stations = []
+            for item in items:
+                station_id = item["notation"]
+                if station_id in known:
+                    continue
+                lat = float(item.get("lat", 0))
+                lon = float(item.get("long", 0))
+                new_stations.append(
+                    EAwaterStation(
+                        station_id=station_id,
+                        name=item.get("label", station_id),
+                        region=get_region(lat, lon),
+                        latitude=lat,
+                        longitude=lon,
+                    )
                 )
-                
+            if new_stations:
+                EAwaterStation.objects.bulk_create(new_stations, ignore_conflicts=True)
+                known.update(
+                    EAwaterStation.objects.filter(
+                        station_id__in=[s.station_id for s in new_stations]
+                    ).in_bulk(field_name="station_id")
+                )
+                print(f"Added {len(new_stations)} new EA stations")
+
+        return {item["notation"]: known[item["notation"]] for item in items if item["notation"] in known}
+
+    def finish(self, writer):
+        """Flush ``writer`` and fold its row count and write time into the result."""
+        writer.flush()
+        self.result.rows_written = writer.rows
+        self.result.timings["write"] = self.result.timings.get("write", 0.0) + writer.seconds
+        return writer.rows
+
+
+class EALatestReadingsScraper(EAScraper):
+    source = "environment_agency"
+
+    def latest_station_reading(self, station, since=None):
+        """Stream one station's readings and return its newest usable one, if any."""
+        latest = None
+        for reading in self.iter_measure_readings(
+            station, _dipped_measure_id(station.station_id), since
+        ):
+            if latest is None or reading[1] >= latest[1]:
+                latest = reading
+        return latest
+
+    def scrape(self, incremental=True):
+        stations = self.sync_station_catalogue()
+
+        since = {}
+        if incremental:
+            stored = dict(
+                EAwaterLevel.objects.values_list("station_id").annotate(Max("date"))
+            )
+            since = {
+                station_id: stored.get(station.pk) for station_id, station in stations.items()
+            }
+
+        writer = EAwaterLevelWriter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {
+                pool.submit(
+                    self.latest_station_reading, station, since.get(station_id)
+                ): station_id
+                for station_id, station in stations.items()
+            }
+            for future in as_completed(futures):
+                station_id = futures[future]
+                try:
+                    latest = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    print(f"Failed to fetch readings for {station_id}: {e}")
+                    continue
+                if latest is None:
+                    continue
+                writer.add(*latest)
+
+        return self.finish(writer)
+
+
+class EAHistoricalScraper(EAScraper):
+    source = "environment_agency_history"
+
+    def scrape(self, incremental=True):
+        stations = self.sync_station_catalogue()
+        watermarks = _load_watermarks()
+
+        writer = EAwaterLevelWriter()
+        for station_id, station in stations.items():
+            newest_by_measure = {}
+            # Measures are re-listed every run, so one added at a known station has no
+            # watermark yet and is backfilled from its first reading.
+            for measure_id in self.list_measures(station_id):
+                since = watermarks.get((station.pk, measure_id)) if incremental else None
+                newest = None
+                for reading in self.iter_measure_readings(station, measure_id, since):
+                    writer.add(*reading)
+                    if newest is None or reading[1] > newest:
+                        newest = reading[1]
+                if newest is not None:
+                    newest_by_measure[measure_id] = newest
+
+            # Only move the high-water marks once this station's rows are committed.
+            writer.flush()
+            for measure_id, newest in newest_by_measure.items():
+                _advance_watermark(watermarks, station, measure_id, newest)
+
+        return self.finish(writer)
+
+
+def extract_EA_stations_water_levels(concurrency: int = None, incremental: bool = True):
+    """Fetch the latest groundwater reading for every EA station.
+
+    Readings are requested by a bounded thread pool sharing one pooled session
+    and a per-host rate limit; all database writes stay on the calling thread so
+    SQLite only ever sees a single writer. In ``incremental`` mode each station
+    only asks for readings newer than its latest stored level.
+    """
+    return EALatestReadingsScraper(concurrency=concurrency).run(incremental=incremental).value
+
+
+def import_historical_EAwater_levels(incremental: bool = True):
+    """Backfill every reading of every measure for all EA groundwater stations.
+
+    Each measure's newest ingested reading is kept in ``EAwaterSyncState``.
+    Every station's measures are listed on each run. In ``incremental`` mode
+    measures with a high-water mark only request readings from that date on,
+    and measures without one (new stations, or new measures at known stations)
+    are backfilled in full.
+    """
+    return EAHistoricalScraper().run(incremental=incremental).value
+
+
 if __name__ == "__main__":
-    extract_EA_stations_water_levels()
\ No newline at end of file
+    extract_EA_stations_water_levels()
@@ -0,0 +1,112 @@
+import hashlib
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from water_levels.models import ScraperPageCache
+
+
+def build_session(pool_size: int = 10, headers: dict = None) -> requests.Session:
+    """Return a keep-alive session whose connection pool fits ``pool_size`` workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+class HostRateLimiter:
+    """Thread-safe limiter spacing requests to the same host at least ``1 / rate`` apart."""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url: str) -> None:
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CachedPage:
+    """Result of a conditional fetch; ``response`` is ``None`` when nothing changed."""
+
+    def __init__(self, entry, response=None, content_hash=""):
+        self.entry = entry
+        self.response = response
+        self.content_hash = content_hash
+
+    @property
+    def changed(self):
+        return self.response is not None
+
+    def save(self):
+        """Remember this page's validators once its content has been processed."""
+        now = timezone.now()
+        self.entry.checked_at = now
+        self.entry.changed = self.changed
+        if self.changed:
+            self.entry.etag = self.response.headers.get("ETag", "")
+            self.entry.last_modified = self.response.headers.get("Last-Modified", "")
+            self.entry.content_hash = self.content_hash
+            self.entry.changed_at = now
+        self.entry.save()
+
+
+def conditional_get(url, session=None, force=False, fingerprint=None, **kwargs):
+    """GET ``url`` with the validators stored from the previous fetch.
+
+    A 304 reply, or a 200 whose body hashes to the stored digest, yields an
+    unchanged ``CachedPage`` (already saved). Otherwise the caller gets the
+    response and must call ``page.save()`` after processing it, so a failed
+    parse is retried on the next run. ``fingerprint`` narrows what is hashed to
+    the part of the page the scraper reads, for pages with per-request noise.
+    """
+    entry, _ = ScraperPageCache.objects.get_or_create(url=url)
+    headers = dict(kwargs.pop("headers", None) or {})
+    if not force:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    response = (session or requests).get(url, headers=headers, **kwargs)
+    if response.status_code == 304:
+        page = CachedPage(entry)
+        page.save()
+        return page
+    response.raise_for_status()
+
+    content = fingerprint(response) if fingerprint else response.content
+    if isinstance(content, str):
+        content = content.encode()
+    content_hash = hashlib.sha256(content).hexdigest()
+    if content_hash == entry.content_hash and not force:
+        page = CachedPage(entry)
+        page.save()
+        return page
+    return CachedPage(entry, response, content_hash)
+
+
+def source_changed(url):
+    """Whether the last fetch of ``url`` found new content (``True`` if never fetched)."""
+    return (
+        ScraperPageCache.objects.filter(url=url)
+        .values_list("changed", flat=True)
+        .first()
+        is not False
+    )
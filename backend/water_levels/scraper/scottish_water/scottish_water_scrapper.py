@@ -3,64 +3,94 @@ from datetime import datetime
 import re
 from typing import Tuple
 
-from bs4 import BeautifulSoup
-import requests
-
+from uk_water_tracker.html_parsing import make_soup
 from water_levels.models import ScottishWaterAverageLevel, ScottishWaterRegionalLevel
-from water_levels.utils import _parse_last_updated, _parse_percentage
+from water_levels.scraper.base import BaseScraper
+from water_levels.utils import LAST_UPDATE_REGEX, _parse_last_updated, _parse_percentage
+
+URL = (
+    "https://www.scottishwater.co.uk/Your-Home/Your-Water/Managing-Water-Resources/"
+    "Scotlands-Water-Resource-Levels"
+)
+TABLE_RE = re.compile(r"<table\b.*?</table>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _data_section(response):
+    """The level tables and the date the scrape stamps them with, without the page chrome."""
+    html = response.text
+    updated = LAST_UPDATE_REGEX.search(TAG_RE.sub(" ", html))
+    tables = TABLE_RE.findall(html)
+    if not tables:
+        return html
+    return "\n".join(tables + [updated.group(1) if updated else ""])
+
+
+def _level_fields(cells):
+    return {
+        "current": _parse_percentage(cells[1].get_text()),
+        "change_from_last_week": _parse_percentage(cells[2].get_text()),
+        "difference_from_average": _parse_percentage(cells[3].get_text()),
+    }
 
 
-def extract_scottish_water_levels() -> Tuple[int, datetime.date]:
-    """Fetch average and regional resource levels from Scottish Water."""
-    url = (
-        "https://www.scottishwater.co.uk/Your-Home/Your-Water/Managing-Water-Resources/"
-        "Scotlands-Water-Resource-Levels"
-    )
-    response = requests.get(url, timeout=10)
-    response.raise_for_status()
+class ScottishWaterScraper(BaseScraper):
+    source = "scottish_water"
+    timeout = 10
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    def scrape(self, force: bool = False) -> Tuple[int, datetime.date]:
+        page = self.conditional_get(URL, force=force, fingerprint=_data_section)
+        if not page.changed:
+            self.result.status = "unchanged"
+            return 0, None
 
-    page_text = soup.get_text(" ", strip=True)
-    last_updated = _parse_last_updated(page_text)
+        with self.phase("parse"):
+            soup = make_soup(page.response.text, source=URL)
+            last_updated = _parse_last_updated(soup.get_text(" ", strip=True))
+            average = None
+            regional = []
 
-    total_count = 0
+            heading = soup.find(string=re.compile("Average levels Scotland-wide", re.I))
+            if heading:
+                table = heading.find_next("table")
+                if table:
+                    row = table.find_all("tr")[-1]
+                    cells = row.find_all(["td", "th"])
+                    if len(cells) >= 4:
+                        average = _level_fields(cells)
 
-    heading = soup.find(string=re.compile("Average levels Scotland-wide", re.I))
-    if heading:
-        table = heading.find_next("table")
-        if table:
-            row = table.find_all("tr")[-1]
-            cells = row.find_all(["td", "th"])
-            if len(cells) >= 4:
+            heading = soup.find(string=re.compile("Average levels across regional areas", re.I))
+            if heading:
+                table = heading.find_next("table")
+                if table:
+                    for row in table.find_all("tr")[1:]:
+                        cells = row.find_all(["td", "th"])
+                        if len(cells) >= 4:
+                            regional.append((cells[0].get_text(strip=True), _level_fields(cells)))
+        self.result.rows_fetched = len(regional) + (average is not None)
+
+        with self.phase("write"):
+            if average is not None:
                 ScottishWaterAverageLevel.objects.update_or_create(
-                    date=last_updated,
-                    defaults={
-                        "current": _parse_percentage(cells[1].get_text()),
-                        "change_from_last_week": _parse_percentage(cells[2].get_text()),
-                        "difference_from_average": _parse_percentage(cells[3].get_text()),
-                    },
+                    date=last_updated, defaults=average
+                )
+            for area, fields in regional:
+                ScottishWaterRegionalLevel.objects.update_or_create(
+                    area=area, date=last_updated, defaults=fields
                 )
+        self.result.rows_written = self.result.rows_fetched
+
+        page.save()
+        return len(regional), last_updated
+
+
+def extract_scottish_water_levels(force: bool = False) -> Tuple[int, datetime.date]:
+    """Fetch average and regional resource levels from Scottish Water.
 
-    heading = soup.find(string=re.compile("Average levels across regional areas", re.I))
-    if heading:
-        table = heading.find_next("table")
-        if table:
-            for row in table.find_all("tr")[1:]:
-                cells = row.find_all(["td", "th"])
-                if len(cells) >= 4:
-                    ScottishWaterRegionalLevel.objects.update_or_create(
-                        area=cells[0].get_text(strip=True),
-                        date=last_updated,
-                        defaults={
-                            "current": _parse_percentage(cells[1].get_text()),
-                            "change_from_last_week": _parse_percentage(cells[2].get_text()),
-                            "difference_from_average": _parse_percentage(cells[3].get_text()),
-                        },
-                    )
-                    total_count += 1
-
-    return total_count, last_updated
+    Returns ``(0, None)`` without parsing when the page is unchanged since the
+    last run.
+    """
+    return ScottishWaterScraper().run(force=force).value
 
 if __name__ == "__main__":
    extract_scottish_water_levels()
\ No newline at end of file
@@ -1,47 +1,71 @@
-import requests
-from bs4 import BeautifulSoup
 import re
 from datetime import datetime
 
+from uk_water_tracker.html_parsing import make_soup
 from water_levels.models import SevernTrentReservoirLevel
+from water_levels.scraper.base import BaseScraper
 
+URL = "https://www.stwater.co.uk/about-us/reservoir-levels/"
+TAG_RE = re.compile(r"<[^>]+>")
+READING_RE = re.compile(r"[\d.]+\s*%\s+\d{1,2}(?:st|nd|rd|th)?\s+[A-Za-z]+\s+20\d\d")
 
-def extract_severn_trent_water_levels():
-    
-    def clean_date(date_str):
-        return re.sub(r"(\d+)(st|nd|rd|th)", r"\1", date_str)
 
-    url = url = "https://www.stwater.co.uk/about-us/reservoir-levels/"
-    headers = {"User-Agent": "Mozilla/5.0"}
+def clean_date(date_str):
+    return re.sub(r"(\d+)(st|nd|rd|th)", r"\1", date_str)
+
 
-    try:
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+def _readings(response):
+    """The percentage/date pairs in the page text, without the page chrome."""
+    readings = READING_RE.findall(TAG_RE.sub("\n", response.text))
+    return "\n".join(readings) if readings else response.text
 
-        lines = [line.strip() for line in soup.text.split("\n") if line.strip()]
-        count = 0
 
-        for i in range(len(lines) - 1):
-            if "%" in lines[i] and "20" in lines[i + 1]:
-                try:
-                    percentage = float(lines[i].replace("%", "").strip())
-                    raw_date = clean_date(lines[i + 1])
-                    date_parsed = datetime.strptime(raw_date, "%d %B %Y").date()
+class SevernTrentScraper(BaseScraper):
+    source = "severn_trent"
+    headers = {"User-Agent": "Mozilla/5.0"}
+
+    def scrape(self, force=False):
+        try:
+            page = self.conditional_get(URL, force=force, fingerprint=_readings)
+            if not page.changed:
+                self.result.status = "unchanged"
+                return "unchanged"
 
+            with self.phase("parse"):
+                soup = make_soup(page.response.text, source=URL)
+                lines = [line.strip() for line in soup.text.split("\n") if line.strip()]
+                records = []
+                for i in range(len(lines) - 1):
+                    if "%" in lines[i] and "20" in lines[i + 1]:
+                        try:
+                            percentage = float(lines[i].replace("%", "").strip())
+                            raw_date = clean_date(lines[i + 1])
+                            date_parsed = datetime.strptime(raw_date, "%d %B %Y").date()
+                            records.append((date_parsed, percentage))
+                        except Exception as e:
+                            print(f"Skipped {lines[i]}, {lines[i+1]} → {e}")
+            self.result.rows_fetched = len(records)
+
+            with self.phase("write"):
+                for date_parsed, percentage in records:
                     SevernTrentReservoirLevel.objects.update_or_create(
                         date=date_parsed,
                         defaults={"percentage": percentage},
                     )
-                    count += 1
-                except Exception as e:
-                    print(f"Skipped {lines[i]}, {lines[i+1]} → {e}")
+            self.result.rows_written = len(records)
+
+            page.save()
+            return f"{len(records)} records updated."
+
+        except Exception as e:
+            print(f"Failed to fetch Severn Trent data: {e}")
+            self.result.status = "error"
+            self.result.error = str(e)
+            return "Error"
 
-        return f"{count} records updated."
 
-    except Exception as e:
-        print(f"Failed to fetch Severn Trent data: {e}")
-        return "Error"
+def extract_severn_trent_water_levels(force=False):
+    return SevernTrentScraper().run(force=force).value
 
 if __name__ == "__main__":
     extract_severn_trent_water_levels()
@@ -1,90 +1,124 @@
-import requests, re
+import re
+import numpy as np
 import pandas as pd
-from datetime import datetime, date
+from datetime import date
 from water_levels.models import SouthernWaterReservoirLevel
+from water_levels.scraper.base import BaseScraper
+from water_levels.utils import bulk_upsert
 
-def extract_southern_water_levels():
-    def parse_southern_date(date_str):
-        date_str = date_str.replace(",", "").strip()
-        match = re.match(r"^(\d{1,2})([A-Za-z]{3})$", date_str)
-        if match:
-            day, month = match.groups()
-            date_str = f"{day} {month}"
-        parts = date_str.split()
-        if len(parts) == 2:
-            day, month = parts
-            month = month[:3].title()
-            if month in ["Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]:
-                year = 2024
-            else:
-                year = 2025
-            date_str = f"{day} {month} {year}"
+URL = "https://www.southernwater.co.uk/about-us/environmental-performance/water-levels/reservoir-levels/"
+ADD_ROWS_RE = re.compile(r"addRows\(\[\s*(.*?)\s*\]\);", re.DOTALL)
+ROW_RE = re.compile(r"\['(.*?)',\s*([\d.]+),\s*([\d.]+),\s*([\d.]+)\]")
+
+RESERVOIR_NAMES = ["Bewl", "Darwell", "Powdermill", "Weir Wood"]
+WATER_YEAR_START = date(2024, 7, 18)
+WATER_YEAR_END = date(2025, 7, 10)
+SECOND_HALF_MONTHS = ["Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def _chart_blocks(response):
+    return "\n".join(ADD_ROWS_RE.findall(response.text)[:4])
+
+
+def parse_southern_dates(raw: pd.Series) -> pd.Series:
+    """Parse chart labels such as ``"18Jul"`` or ``"3 Jan"`` into datetimes.
+
+    Labels without a year fall in the 2024/25 water year: July to December are
+    2024, the rest 2025. Unparseable labels become ``NaT``.
+    """
+    labels = raw.str.replace(",", "", regex=False).str.strip()
+    labels = labels.str.replace(r"^(\d{1,2})([A-Za-z]{3})$", r"\1 \2", regex=True)
+    parts = labels.str.extract(r"^(\S+)\s+(\S+)$")
+    month = parts[1].str[:3].str.title()
+    year = pd.Series(np.where(month.isin(SECOND_HALF_MONTHS), "2024", "2025"), index=labels.index)
+    labels = labels.where(parts[0].isna(), parts[0] + " " + month + " " + year)
+    return pd.to_datetime(labels, format="%d %b %Y", errors="coerce")
+
+
+def prepare_reservoir_levels(rows) -> pd.DataFrame:
+    """Turn one reservoir's ``(date, actual, average, minimum)`` chart rows into levels.
+
+    Weekly and four-weekly changes are taken over the full chart before the
+    water-year window is applied, so the first rows in the window still see
+    their predecessors.
+    """
+    df = pd.DataFrame(rows, columns=["date", "actual", "average", "minimum"])
+    actual = df["actual"].astype(float)
+    average = df["average"].astype(float)
+
+    levels = pd.DataFrame(
+        {
+            "date": parse_southern_dates(df["date"]).dt.date,
+            "current_level": actual,
+            "average_level": average,
+            "change_week": actual.diff(1).round(2).fillna(0.0),
+            "change_month": actual.diff(4).round(2).fillna(0.0),
+            "difference_from_average": (actual - average).round(2),
+        }
+    )
+    unparsed = levels["date"].isna()
+    if unparsed.any():
+        print(f"Failed to parse {unparsed.sum()} dates: {df.loc[unparsed, 'date'].tolist()}")
+
+    in_year = levels["date"].notna() & levels["date"].between(WATER_YEAR_START, WATER_YEAR_END)
+    return levels[in_year].drop_duplicates("date", keep="last")
+
+
+class SouthernWaterScraper(BaseScraper):
+    source = "southern_water"
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+
+    def scrape(self, force=False):
         try:
-            dt = datetime.strptime(date_str, "%d %b %Y").date()
-            return dt
+            page = self.conditional_get(URL, force=force, fingerprint=_chart_blocks)
         except Exception as e:
-            print(f"Failed to parse: '{date_str}' ({e})")
-            return None
+            print(f"Failed to fetch southern water page: {e}")
+            self.result.status = "error"
+            self.result.error = str(e)
+            return "error"
+        if not page.changed:
+            print("Southern Water chart data unchanged, skipping.")
+            self.result.status = "unchanged"
+            return "unchanged"
 
-    url = "https://www.southernwater.co.uk/about-us/environmental-performance/water-levels/reservoir-levels/"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-    try:
-        response = requests.get(url, headers=headers, timeout=20)
-        html = response.text
-    except Exception as e:
-        print(f"Failed to fetch southern water page: {e}")
-        return "error"
-
-    blocks = re.findall(r"addRows\(\[\s*(.*?)\s*\]\);", html, re.DOTALL)[:4]
-    reservoir_names = ["Bewl", "Darwell", "Powdermill", "Weir Wood"]
-
-    WATER_YEAR_START = date(2024, 7, 18)
-    WATER_YEAR_END = date(2025, 7, 10)
-
-    for i, block in enumerate(blocks):
-        rows = re.findall(r"\['(.*?)',\s*([\d.]+),\s*([\d.]+),\s*([\d.]+)\]", block)
-        if not rows:
-            print(f"No data found for {reservoir_names[i]}")
-            continue
-
-        df = pd.DataFrame(rows, columns=["date", "actual", "average", "minimum"])
-        df["actual"] = df["actual"].astype(float)
-        df["average"] = df["average"].astype(float)
-        df = df.reset_index(drop=True)
-
-        for j, row in df.iterrows():
-            orig_date_str = row["date"]
-            dt = parse_southern_date(orig_date_str)
-            if not dt:
-                continue
-            if not (WATER_YEAR_START <= dt <= WATER_YEAR_END):
-                continue
-
-            current = row["actual"]
-            avg = row["average"]
-            diff = round(current - avg, 2)
-            change_week = (
-                round(current - df.loc[j - 1, "actual"], 2) if j > 0 else 0.0
-            )
-            change_month = (
-                round(current - df.loc[j - 4, "actual"], 2) if j >= 4 else 0.0
-            )
-
-            SouthernWaterReservoirLevel.objects.update_or_create(
-                reservoir=reservoir_names[i],
-                date=dt,
-                defaults={
-                    "current_level": current,
-                    "average_level": avg,
-                    "change_week": change_week,
-                    "change_month": change_month,
-                    "difference_from_average": diff,
-                },
-            )
-            print(f"Saved: {reservoir_names[i]}, {dt}, value: {current}")
-
-    print("Done updating Southern Water levels (custom water year).")
-    return "done"
+        with self.phase("parse"):
+            blocks = ADD_ROWS_RE.findall(page.response.text)[:4]
+
+        for i, block in enumerate(blocks):
+            with self.phase("parse"):
+                rows = ROW_RE.findall(block)
+                if not rows:
+                    print(f"No data found for {RESERVOIR_NAMES[i]}")
+                    continue
+                levels = prepare_reservoir_levels(rows)
+            self.result.rows_fetched += len(levels)
+
+            with self.phase("write"):
+                saved = bulk_upsert(
+                    SouthernWaterReservoirLevel,
+                    [
+                        SouthernWaterReservoirLevel(reservoir=RESERVOIR_NAMES[i], **record)
+                        for record in levels.to_dict("records")
+                    ],
+                    unique_fields=["reservoir", "date"],
+                    update_fields=[
+                        "current_level",
+                        "average_level",
+                        "change_week",
+                        "change_month",
+                        "difference_from_average",
+                    ],
+                )
+            self.result.rows_written += saved
+            print(f"Saved {saved} rows for {RESERVOIR_NAMES[i]}")
+
+        page.save()
+        print("Done updating Southern Water levels (custom water year).")
+        return "done"
+
+
+def extract_southern_water_levels(force=False):
+    return SouthernWaterScraper().run(force=force).value
 
 if __name__ == "__main__":
-    extract_southern_water_levels()
\ No newline at end of file
+    extract_southern_water_levels()
@@ -1,11 +1,9 @@
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import time
 
-import requests
-from bs4 import BeautifulSoup
 
 if __package__ in (None, ""):
     import django
@@ -16,6 +14,10 @@ if __package__ in (None, ""):
 else:
     from water_levels.models import YorkshireReservoirData
 
+from uk_water_tracker.html_parsing import make_soup
+
+from water_levels.scraper.base import BaseScraper
+
 
 URL = "https://datamillnorth.org/dataset/vqxw4/watsit-water-situation-report"
 
@@ -29,96 +31,162 @@ DIRECTION_RE = re.compile(r"(increased|decreased|up|down)", re.I)
 DIFF_RE = re.compile(r"\(up ([\d.]+)%|down ([\d.]+)%", re.I)
 
 
-def extract_yorkshire_reservoir_data():
-    """Scrape reservoir summary blocks from the Yorkshire Water dataset page."""
-    data_list = []
-    processed_texts = set()
-    max_pages = 10
-
-    for page in range(1, max_pages + 1):
-        try:
-            response = requests.get(f"{URL}?page={page}", timeout=20)
-            response.raise_for_status()
-        except Exception as e:
-            print(f"Failed to fetch page {page}: {e}")
-            break
-
-        soup = BeautifulSoup(response.content, "html.parser")
-        blocks = soup.find_all("div", class_="container is-flex")
-
-        if not blocks:
-            print(f"No blocks found on page {page}. Stopping pagination.")
-            break
-
-        for block in blocks:
-            text = " ".join(block.get_text(separator=" ", strip=True).split()).replace("%%", "%")
-            if text in processed_texts:
-                print(f"Skipping duplicate block: {text[:50]}...")
-                continue
-            processed_texts.add(text)
-
-            date_match = DATE_RE.search(text)
-            from_to_match = FROM_TO_LEVEL_RE.search(text)
-            to_level_match = TO_LEVEL_RE.search(text)
-            direction_match = DIRECTION_RE.search(text)
-            diff_match = DIFF_RE.search(text)
-
-            if not date_match:
-                continue
-
-            report_date = datetime.strptime(date_match.group(), "%B %Y").date()
-            report_date = datetime(report_date.year, report_date.month, 1).date()
-
-            level = None
-            if from_to_match:
-                level = float(from_to_match.group(2))
-            elif to_level_match:
-                level = float(to_level_match.group(1))
-            else:
-                continue
-
-            direction = direction_match.group(1).lower() if direction_match else ""
-
-            weekly_diff = None
-            if diff_match:
-                up = diff_match.group(1)
-                down = diff_match.group(2)
-                if up:
-                    weekly_diff = float(up)
-                elif down:
-                    weekly_diff = -float(down)
-
-            data_list.append({
-                "report_date": report_date,
-                "reservoir_level": level,
-                "weekly_difference": weekly_diff,
-                "direction": direction,
-            })
-
-        time.sleep(0.5)
-
-    return data_list
-
-
-def scrape_site():
-    """Fetch and store Yorkshire reservoir data into the database."""
-    records = extract_yorkshire_reservoir_data()
-    if not records:
-        return False
-
-    inserted = False
-    for item in records:
-        _, created = YorkshireReservoirData.objects.update_or_create(
-            report_date=item["report_date"],
-            defaults={
-                "reservoir_level": item["reservoir_level"],
-                "weekly_difference": item["weekly_difference"],
-                "direction": item["direction"],
-            },
+def _report_date(text):
+    """Return the first day of the report month named in ``text``, if any."""
+    date_match = DATE_RE.search(text)
+    if not date_match:
+        return None
+    return datetime.strptime(date_match.group(), "%B %Y").date().replace(day=1)
+
+
+def _parse_block(text, report_date):
+    """Run the compiled level/direction regexes over one normalised block."""
+    from_to_match = FROM_TO_LEVEL_RE.search(text)
+    if from_to_match:
+        level = float(from_to_match.group(2))
+    else:
+        to_level_match = TO_LEVEL_RE.search(text)
+        if not to_level_match:
+            return None
+        level = float(to_level_match.group(1))
+
+    direction_match = DIRECTION_RE.search(text)
+    direction = direction_match.group(1).lower() if direction_match else ""
+
+    weekly_diff = None
+    diff_match = DIFF_RE.search(text)
+    if diff_match:
+        up = diff_match.group(1)
+        down = diff_match.group(2)
+        if up:
+            weekly_diff = float(up)
+        elif down:
+            weekly_diff = -float(down)
+
+    return {
+        "report_date": report_date,
+        "reservoir_level": level,
+        "weekly_difference": weekly_diff,
+        "direction": direction,
+    }
+
+
+class YorkshireScraper(BaseScraper):
+    source = "yorkshire"
+    concurrency_setting = "YORKSHIRE_CRAWL_CONCURRENCY"
+    rate_setting = "YORKSHIRE_REQUESTS_PER_SECOND"
+
+    def page_texts(self, page):
+        """Fetch one listing page and return the normalised text of each block."""
+        response = self.get(f"{URL}?page={page}")
+        response.raise_for_status()
+        with self.phase("parse"):
+            soup = make_soup(response.content, source=URL)
+            return [
+                " ".join(block.get_text(separator=" ", strip=True).split()).replace("%%", "%")
+                for block in soup.find_all("div", class_="container is-flex")
+            ]
+
+    def crawl(self, known_dates=None, max_pages=10):
+        """Scrape reservoir summary blocks from the Yorkshire Water dataset page.
+
+        Pages are fetched ``YORKSHIRE_CRAWL_CONCURRENCY`` at a time within the
+        ``YORKSHIRE_REQUESTS_PER_SECOND`` budget and handled in page order. Blocks
+        for months in ``known_dates`` are skipped, and the crawl stops at the first
+        page whose reports are all already known.
+        """
+        known_dates = set(known_dates or ())
+        data_list = []
+        processed_texts = set()
+        done = False
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for first in range(1, max_pages + 1, self.concurrency):
+                pages = range(first, min(first + self.concurrency, max_pages + 1))
+                futures = [pool.submit(self.page_texts, page) for page in pages]
+
+                for page, future in zip(pages, futures):
+                    try:
+                        texts = future.result()
+                    except Exception as e:
+                        print(f"Failed to fetch page {page}: {e}")
+                        done = True
+                        break
+
+                    if not texts:
+                        print(f"No blocks found on page {page}. Stopping pagination.")
+                        done = True
+                        break
+
+                    page_dates = set()
+                    for text in texts:
+                        if text in processed_texts:
+                            print(f"Skipping duplicate block: {text[:50]}...")
+                            continue
+                        processed_texts.add(text)
+
+                        report_date = _report_date(text)
+                        if report_date is None:
+                            continue
+                        page_dates.add(report_date)
+                        if report_date in known_dates:
+                            continue
+
+                        record = _parse_block(text, report_date)
+                        if record:
+                            data_list.append(record)
+
+                    if page_dates and page_dates <= known_dates:
+                        print(f"Page {page} holds only stored reports. Stopping pagination.")
+                        done = True
+                        break
+
+                if done:
+                    for future in futures:
+                        future.cancel()
+                    break
+
+        self.result.rows_fetched = len(data_list)
+        return data_list
+
+    def scrape(self, force=False):
+        known_dates = () if force else YorkshireReservoirData.objects.values_list(
+            "report_date", flat=True
         )
-        inserted = inserted or created
-
-    return inserted
+        records = self.crawl(known_dates=known_dates)
+        if not records:
+            self.result.status = "unchanged"
+            return False
+
+        inserted = False
+        with self.phase("write"):
+            for item in records:
+                _, created = YorkshireReservoirData.objects.update_or_create(
+                    report_date=item["report_date"],
+                    defaults={
+                        "reservoir_level": item["reservoir_level"],
+                        "weekly_difference": item["weekly_difference"],
+                        "direction": item["direction"],
+                    },
+                )
+                inserted = inserted or created
+        self.result.rows_written = len(records)
+
+        return inserted
+
+
+def extract_yorkshire_reservoir_data(known_dates=None, max_pages=10):
+    """Crawl the dataset pages and return parsed report records; see ``YorkshireScraper.crawl``."""
+    with YorkshireScraper() as scraper:
+        return scraper.crawl(known_dates=known_dates, max_pages=max_pages)
+
+
+def scrape_site(force=False):
+    """Fetch and store Yorkshire reservoir data into the database.
+
+    Report months already stored are not re-scraped unless ``force`` is set.
+    """
+    return YorkshireScraper().run(force=force).value
 
 
 if __name__ == "__main__":
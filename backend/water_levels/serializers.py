@@ -12,6 +12,7 @@ from .models import (
     EAwaterStation,
     EAwaterLevel,
     EAwaterPrediction,
+    EAwaterStationPrediction,
     EAwaterPredictionAccuracy,
     SevernTrentForecastAccuracy,
     YorkshireWaterPredictionAccuracy,
@@ -114,6 +115,12 @@ class EAwaterPredictionSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class EAwaterStationPredictionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EAwaterStationPrediction
+        fields = "__all__"
+
+
 class EAwaterPredictionAccuracySerializer(serializers.ModelSerializer):
     class Meta:
         model = EAwaterPredictionAccuracy
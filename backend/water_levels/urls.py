@@ -14,6 +14,7 @@ from .views import (
     EAwaterStationViewSet,
     EAwaterLevelViewSet,
     EAwaterPredictionViewSet,
+    EAwaterStationPredictionViewSet,
     EAwaterPredictionAccuracyViewSet,
     SevernTrentForecastAccuracyViewSet,
     YorkshireWaterPredictionAccuracyViewSet,
@@ -32,6 +33,7 @@ router.register(r"southernwater-reservoirs", SouthernWaterReservoirLevelViewSet)
 router.register(r"groundwater-stations", EAwaterStationViewSet)
 router.register(r"groundwater-levels", EAwaterLevelViewSet)
 router.register(r"groundwater-predictions", EAwaterPredictionViewSet)
+router.register(r"groundwater-station-predictions", EAwaterStationPredictionViewSet)
 router.register(
     r"groundwater-prediction-accuracy", EAwaterPredictionAccuracyViewSet
 )
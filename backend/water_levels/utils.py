@@ -1,6 +1,7 @@
 import re
 from datetime import datetime
 import pandas as pd
+from django.db import transaction
 
 from .models import EAwaterLevel, EAwaterStation
 
@@ -49,4 +50,45 @@ def get_region_timeseries(region):
         return pd.Series(dtype=float)
     df["date"] = pd.to_datetime(df["date"])
     df = df.groupby("date")["value"].mean().asfreq("W")
-    return df.sort_index()
\ No newline at end of file
+    return df.sort_index()
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=1000):
+    """Insert ``objs`` or update their ``update_fields`` on a unique-key conflict.
+
+    All batches run inside a single transaction. Returns the number of rows sent.
+    """
+    if not objs:
+        return 0
+    with transaction.atomic():
+        model.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+    return len(objs)
+
+
+def upsert_forecasts(model, rows, batch_size=1000):
+    """Write forecast ``rows`` (dicts of field values) to ``model`` in one transaction.
+
+    Rows are matched on the model's ``unique_together`` key; on a conflict the
+    other fields given in the rows are updated. Foreign keys may be given by
+    attname (``station_id``). If a key repeats within the batch the last row
+    wins. Returns the number of rows sent.
+    """
+    if not rows:
+        return 0
+    key = list(model._meta.unique_together[0])
+    names = {f.attname: f.name for f in model._meta.concrete_fields}
+    update_fields = [names.get(name, name) for name in rows[0] if names.get(name, name) not in key]
+    attnames = [model._meta.get_field(name).attname for name in key]
+    latest = {
+        tuple(row[name] if name in row else row[attname] for name, attname in zip(key, attnames)): row
+        for row in rows
+    }
+    return bulk_upsert(
+        model, [model(**row) for row in latest.values()], key, update_fields, batch_size
+    )
@@ -1,7 +1,7 @@
 from rest_framework import viewsets, generics
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .filters import EAwaterPredictionFilter
+from .filters import EAwaterPredictionFilter, EAwaterStationPredictionFilter
 from rest_framework.response import Response
 from .scraper.scottish_water.scottish_water_scrapper import extract_scottish_water_levels
 from .models import (
@@ -18,6 +18,7 @@ from .models import (
     EAwaterStation,
     EAwaterLevel,
     EAwaterPrediction,
+    EAwaterStationPrediction,
     EAwaterPredictionAccuracy,
     SevernTrentForecastAccuracy,
     YorkshireWaterPredictionAccuracy,
@@ -39,6 +40,7 @@ from .serializers import (
     EAwaterStationSerializer,
     EAwaterLevelSerializer,
     EAwaterPredictionSerializer,
+    EAwaterStationPredictionSerializer,
     EAwaterPredictionAccuracySerializer,
     SevernTrentForecastAccuracySerializer,
     YorkshireWaterPredictionAccuracySerializer,
@@ -57,7 +59,7 @@ class ScottishWaterAverageLevelViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         if not queryset.exists():
-            extract_scottish_water_levels()
+            extract_scottish_water_levels(force=True)
             queryset = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
@@ -72,7 +74,7 @@ class ScottishWaterRegionalLevelViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         if not queryset.exists():
-            extract_scottish_water_levels()
+            extract_scottish_water_levels(force=True)
             queryset = self.filter_queryset(self.get_queryset())
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
@@ -173,6 +175,13 @@ class EAwaterPredictionViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
 
 
+class EAwaterStationPredictionViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = EAwaterStationPrediction.objects.all().order_by("station", "date")
+    serializer_class = EAwaterStationPredictionSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = EAwaterStationPredictionFilter
+
+
 class EAwaterPredictionAccuracyViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = EAwaterPredictionAccuracy.objects.all().order_by("-date")
     serializer_class = EAwaterPredictionAccuracySerializer